@@ -0,0 +1,83 @@
+""" Benchmark of the cache formats: the JSON cache file against the binary one, plain and compressed.
+	Compares the file size, the time to write it, to read every record and to read a single record.
+	The cache files are written and read the way the script does, through `commit_cache_part` and 
+	`read_from_file`, so the reads include checking the file against the manifest: by its size and 
+	modification time, or by its hash when verified (as with `--refresh`).
+
+	Usage: python ./benchmarks/bench_cache.py ([record count, DEFAULT=100000])
+"""
+from pathlib import Path
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import script
+from bench_transform import make_people
+
+def time_call(function) -> float:
+	""" Returns how long `function()` takes to run, in seconds. """
+	start: float = time.perf_counter()
+	function()
+
+	return time.perf_counter() - start
+
+def bench_format(directory: str, people: list, cache_format: str, compress: bool):
+	""" Writes `people` to a cache file in `directory` in the given format, then times reading it back.
+
+			Parameters:
+				directory (str): The directory to write the cache file to
+				people (list): The records to cache
+				cache_format (str): `json` or `binary`
+				compress (bool): Whether a binary cache is compressed
+
+			Returns:
+				results (tuple): The file size, write, full read, single record read and verified single 
+				record read times
+	"""
+	script.CACHE_FORMAT = cache_format
+	script.COMPRESS_CACHE = compress
+	manifest: dict = {}
+
+	def write():
+		writer = script.open_cache_writer(script.cache_part_path('swapi_data', directory, 'people'))
+		writer.append(people)
+		writer.finish()
+		script.commit_cache_part('swapi_data', directory, 'people', len(people), manifest)
+
+	def read(verify: bool):
+		assert script.read_from_file('swapi_data', directory, 'people', manifest, verify)
+
+	def read_all():
+		read(False)
+
+		for _ in script.DATA['people']:
+			pass
+
+	def read_one(verify: bool = False):
+		read(verify)
+		script.DATA['people'][len(people) // 2]
+
+	write_time: float = time_call(write)
+	file_path: str = script.cache_path('swapi_data', directory, 'people')
+
+	return (os.path.getsize(file_path), write_time, time_call(read_all), time_call(read_one), 
+		time_call(lambda: read_one(True)))
+
+def main():
+	count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+	people: list = make_people(count)
+
+	print(f'{count} people records')
+	print('\tformat\t\tsize (KiB)\twrite\t\tread all\tread one\tread one, verified')
+
+	with tempfile.TemporaryDirectory() as directory:
+		for label, cache_format, compress in [('json', 'json', False), ('binary', 'binary', False), ('binary + zlib', 'binary', True)]:
+			size, write_time, read_all_time, read_one_time, verified_time = bench_format(directory, people, cache_format, compress)
+			print(f'\t{label:<14}\t{size / 1024:>10,.0f}\t{write_time:.3f}s\t\t{read_all_time:.3f}s\t\t{read_one_time * 1000:.2f}ms'
+				+ f'\t\t{verified_time * 1000:.2f}ms')
+
+if __name__ == '__main__':
+	main()
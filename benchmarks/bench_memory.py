@@ -0,0 +1,52 @@
+""" Memory benchmark of the records in `DATA`: the JSON dicts they're read as, against the compact records
+	of `compact_category` (`--compact`). The records are parsed from JSON, like a cache or a custom dataset,
+	so no strings are shared that wouldn't be, and measured with tracemalloc.
+
+	Usage: python ./benchmarks/bench_memory.py ([record count per category, DEFAULT=20000])
+"""
+from pathlib import Path
+import json
+import sys
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import script
+from synthetic import make_dataset
+
+def traced_size(make) -> int:
+	""" Returns the memory still held by what `make` returns, in bytes. """
+	tracemalloc.start()
+	tracemalloc.clear_traces()
+	kept = make()
+	size: int = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+
+	del kept
+	return size
+
+def main():
+	count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+	encoded: str = json.dumps(make_dataset(count))
+
+	def read_dicts() -> dict:
+		return json.loads(encoded)
+
+	def read_compact() -> dict:
+		script.DATA = json.loads(encoded)
+
+		for category_name in script.SCHEMA:
+			script.compact_category(category_name)
+
+		return script.DATA
+
+	dicts: int = traced_size(read_dicts)
+	compact: int = traced_size(read_compact)
+
+	print(f'{count} records per category, {len(script.SCHEMA)} categories')
+	print(f'\tdicts:\t\t{dicts / 1048576:.1f} MiB')
+	print(f'\tcompact:\t{compact / 1048576:.1f} MiB')
+	print(f'\tratio:\t\t{compact / dicts:.2f}')
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,153 @@
+""" End-to-end benchmark: serves synthetic SWAPI shaped data from the local stub, then times fetching every
+	category with `fetch_category`, transforming it into rows with `transform_rows` and loading the rows into
+	PostgreSQL with the `LOAD_METHOD` loader, each phase on its own. The results are written as JSON and, given
+	the results of an earlier run, compared against them.
+	The database is the one the script connects to, with the same environment variables (DB_HOST, DB_PORT,
+	BOOTCAMP_USER, BOOTCAMP_CREDS), plus DB_NAME for the database name. The load is rolled back, so the existing
+	tables are left as they were.
+
+	Usage: python ./benchmarks/bench_pipeline.py ([record count per category, DEFAULT=1000] [results file, DEFAULT=./bench_results.json] [earlier results file])
+"""
+from pathlib import Path
+from datetime import datetime, timezone
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import script
+from stub_server import start_stub
+from synthetic import make_dataset
+
+LOADERS: dict = {
+	'copy': script.copy_rows,
+	'batch': script.batch_insert_rows,
+	'insert': script.insert_rows
+}
+
+def phase_result(seconds: float, record_count: int) -> dict:
+	""" Returns the JSON result of a phase of one category. """
+	return {
+		'seconds': round(seconds, 6),
+		'records': record_count,
+		'records_per_second': round(record_count / seconds) if seconds > 0 else None
+	}
+
+async def bench_fetch(category_names: list, dataset: dict) -> dict:
+	""" Times `fetch_category` for every category, one after another, against the stub serving `dataset`. """
+	results: dict = {}
+	runner, script.SWAPI_API_URL = await start_stub(dataset)
+
+	try:
+		async with script.make_session() as session:
+			for category_name in category_names:
+				start: float = time.perf_counter()
+
+				if not await script.fetch_category(session, category_name):
+					sys.exit(f'Fetching {category_name} from the stub failed')
+
+				results[category_name] = phase_result(time.perf_counter() - start, len(script.DATA[category_name]))
+
+	finally:
+		await runner.cleanup()
+
+	return results
+
+def bench_transform(category_names: list, rows: dict) -> dict:
+	""" Times `transform_rows` for every category, keeping the rows in `rows` for the load. """
+	results: dict = {}
+	script.build_entity_index(category_names)
+
+	for category_name in category_names:
+		script.build_columns(category_name)
+		start: float = time.perf_counter()
+		rows[category_name] = list(script.transform_rows(category_name))
+		results[category_name] = phase_result(time.perf_counter() - start, len(rows[category_name]))
+
+	return results
+
+def bench_load(category_names: list, rows: dict) -> dict:
+	""" Times loading the transformed rows of every category into a fresh table, then rolls everything back. """
+	results: dict = {}
+	load_rows = LOADERS[script.LOAD_METHOD]
+	connection = script.open_connections(1)[0]
+	cursor = connection.cursor()
+
+	try:
+		for category_name in category_names:
+			if not script.create_table(cursor, category_name):
+				sys.exit(f'Creating the {category_name} table failed')
+
+			start: float = time.perf_counter()
+			load_rows(cursor, category_name, iter(rows[category_name]))
+			results[category_name] = phase_result(time.perf_counter() - start, len(rows[category_name]))
+
+	finally:
+		connection.rollback()
+		cursor.close()
+		connection.close()
+
+	return results
+
+def compare(previous: dict, current: dict):
+	""" Prints the change in time of every phase and category from the `previous` results to the `current` ones. """
+	print(f'Compared to {previous["created"]}:')
+
+	for phase, categories in current['phases'].items():
+		for category_name, result in categories.items():
+			before: dict = previous['phases'].get(phase, {}).get(category_name)
+
+			if before is None or before['seconds'] == 0:
+				continue
+
+			change: float = (result['seconds'] - before['seconds']) / before['seconds'] * 100
+			print(f'\t{phase:<10}\t{category_name:<10}\t{before["seconds"]:.3f}s -> {result["seconds"]:.3f}s\t{change:+.1f}%')
+
+def main():
+	count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+	results_path: str = sys.argv[2] if len(sys.argv) > 2 else './bench_results.json'
+	previous_path: str = sys.argv[3] if len(sys.argv) > 3 else None
+
+	script.DATABASE = os.environ.get('DB_NAME', script.DATABASE)
+	script.CACHE = False
+	category_names: list = list(script.SCHEMA)
+	dataset: dict = make_dataset(count)
+	rows: dict = {}
+
+	phases: dict = {'fetch': asyncio.run(bench_fetch(category_names, dataset))}
+	phases['transform'] = bench_transform(category_names, rows)
+	phases['load'] = bench_load(category_names, rows)
+
+	results: dict = {
+		'created': datetime.now(timezone.utc).isoformat(),
+		'records_per_category': count,
+		'python': platform.python_version(),
+		'settings': {
+			'page_concurrency': script.PAGE_CONCURRENCY,
+			'load_method': script.LOAD_METHOD,
+			'batch_size': script.BATCH_SIZE,
+			'format': script.FORMAT,
+			'transform_workers': script.TRANSFORM_WORKERS
+		},
+		'phases': phases,
+		'totals': {phase: round(sum(result['seconds'] for result in categories.values()), 6) for phase, categories in phases.items()}
+	}
+
+	with open(results_path, 'w') as results_file:
+		json.dump(results, results_file, indent=2)
+
+	print(f'{count} records per category, written to {results_path}')
+
+	for phase, seconds in results['totals'].items():
+		print(f'\t{phase:<10}\t{seconds:.3f}s')
+
+	if previous_path is not None:
+		with open(previous_path) as previous_file:
+			compare(json.load(previous_file), results)
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,197 @@
+""" Micro-benchmark of the row transform in `populate_table`: the per-cell loop it used to run against
+	the column converters compiled by `compile_row_transformer`.
+
+	Usage: python ./benchmarks/bench_transform.py ([record count, DEFAULT=100000])
+"""
+from pathlib import Path
+import sys
+import timeit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import script
+
+COLORS: list = ['blue', 'grey', 'brown', 'blond', 'n/a', 'unknown', 'blue, grey', 'brown, white, red']
+# The legacy loop only reads the first digit of an id, so the people only live on the first 9 planets
+PLANET_NAMES: list = [f'Planet {i}' for i in range(1, 10)]
+
+def make_people(count: int) -> list:
+	""" Makes `count` SWAPI shaped people entries.
+
+			Parameters:
+				count (int): The number of entries to make
+
+			Returns:
+				people (list): The entries
+	"""
+	people: list = []
+
+	for i in range(count):
+		people.append({
+			'name': f'Person {i}',
+			'gender': 'n/a' if i % 5 == 0 else 'female',
+			'height': '172',
+			'mass': 'unknown',
+			'birth_year': '19BBY',
+			'hair_color': COLORS[i % len(COLORS)],
+			'skin_color': COLORS[(i + 3) % len(COLORS)],
+			'eye_color': COLORS[(i + 5) % len(COLORS)],
+			'homeworld': f'https://swapi.dev/api/planets/{i % 9 + 1}/',
+			'films': [f'https://swapi.dev/api/films/{n}/' for n in range(1, i % 6 + 1)],
+		})
+
+	return people
+
+def legacy_build_rows(category_name):
+	""" The per-cell transform loop of `populate_table` before it was compiled from `SCHEMA`. """
+	schema:dict = script.SCHEMA[category_name]
+	collection: list = script.DATA[category_name]
+	has_generated_key: bool = schema['generated_key']
+	key: list = schema['key']
+
+	# Formatting
+	unknown: str = 'unknown'
+	none: str = 'none'
+	na: str = 'n/a'
+	null: str = 'NULL'
+	upper_na: str = 'N/A'
+
+	for entry in collection:
+		data: tuple = ()
+
+		for column in schema['columns']:
+			column_name: str = column['column_name']
+
+			if has_generated_key and column_name in key:
+				continue
+
+			entry_data = entry[column_name]
+
+			# Make the columns with 'unknown's consistent
+			if script.FORMAT:
+				data_type: str = type(entry_data).__name__
+				if data_type == "str":
+					if entry_data == unknown or entry_data == none or entry_data == upper_na or entry_data == na:
+						entry_data = null
+				elif data_type == "list":
+					for element in entry_data:
+						if type(element).__name__ == "str":
+							if element == unknown or element == none or element == upper_na or entry_data == na:
+								element = null
+
+			
+			is_null: bool =  entry_data == 'NULL'
+
+			if column_name == 'films':
+				arr_data: str = "{ "
+				filmCount = len(entry_data)
+				for index, film in enumerate(entry_data):
+					film_number_index: int = film.index('films/') + 6
+					film_number: int = int(film[film_number_index])
+					film_name: str = script.FILM_TITLES[film_number - 1]
+
+					arr_data += f'{film_name}'
+
+					if index + 1 < filmCount:
+						arr_data += ', '
+
+				arr_data += " }"
+				entry_data = arr_data
+
+			elif column_name == 'homeworld':
+				planet_number_index: int = entry_data.index('planets/') + 8
+				planet_number: int = int(entry_data[planet_number_index])
+				planet_name: str = PLANET_NAMES[planet_number - 1]
+
+				entry_data = f'{planet_name}'
+
+			elif column['array_parse']:
+				# parse this field into an array
+				# , as a delimiter
+				arr_data: str = ''
+
+				if not is_null:
+					arr_data = '{ '
+				
+				commaCount = entry_data.count(',')
+			
+				if commaCount > 0:
+					field: str = ''
+					left_index: int = 0
+					right_index: int = 0
+					length: int = len(entry_data)
+
+					while True:
+						end: bool = length < right_index + 1
+						if end or entry_data[right_index] == ',':
+							field = entry_data[left_index : right_index]
+							arr_data += f'"{field}"'
+							
+							if not end:
+								arr_data += ', '
+								left_index = right_index + 1
+
+								while entry_data[left_index] == ' ':
+									left_index += 1
+
+								right_index =  left_index + 1
+
+							else:
+								break
+
+						else:
+							right_index += 1
+
+				else:
+					arr_data += f'{entry_data}'
+
+				if not is_null:
+					arr_data += ' }'
+				else:
+					arr_data = None
+
+				entry_data = arr_data
+
+			elif is_null:
+				entry_data = None
+
+			data += (entry_data,)
+
+		yield data
+
+def literal_elements(row: tuple) -> tuple:
+	""" Reads the array literals of a legacy row, such as `{ "blue", "grey" }`, into the lists `build_rows` makes. """
+	values: list = []
+
+	for value in row:
+		if type(value) is str and value.startswith('{'):
+			inner: str = value[1:-1].strip()
+			value = [element.strip().strip('"') for element in inner.split(',')] if inner != '' else []
+
+		values.append(value)
+
+	return tuple(values)
+
+def main():
+	count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+	category_name: str = 'people'
+
+	script.build_columns(category_name)
+	script.DATA['planets'] = [{'name': name, 'url': f'https://swapi.dev/api/planets/{i}/'} for i, name in enumerate(PLANET_NAMES, start=1)]
+	script.DATA[category_name] = make_people(count)
+	script.build_entity_index([category_name])
+
+	if [literal_elements(row) for row in legacy_build_rows(category_name)] != list(script.build_rows(category_name)):
+		print('The compiled transform does not match the legacy loop!')
+		sys.exit(-1)
+
+	legacy: float = min(timeit.repeat(lambda: list(legacy_build_rows(category_name)), number=1, repeat=3))
+	compiled: float = min(timeit.repeat(lambda: list(script.build_rows(category_name)), number=1, repeat=3))
+
+	print(f'{count} {category_name} records, best of 3')
+	print(f'\tlegacy loop:\t{legacy:.3f}s\t{count / legacy:,.0f} rows/s')
+	print(f'\tcolumnar:\t{compiled:.3f}s\t{count / compiled:,.0f} rows/s')
+	print(f'\tspeed up:\t{legacy / compiled:.2f}x')
+
+if __name__ == '__main__':
+	main()
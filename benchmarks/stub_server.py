@@ -0,0 +1,103 @@
+""" A local stand-in for SWAPI, which serves a dataset in SWAPI's paginated format: `/api/<category>/?page=N`
+	answers with the `count`, `next`, `previous` and `results` of the page. The pages are encoded up front, so
+	the stub itself costs next to nothing while it's measured against.
+
+	Usage: python ./benchmarks/stub_server.py ([record count per category, DEFAULT=1000] [port, DEFAULT=8765] [latency in ms, DEFAULT=0])
+"""
+from pathlib import Path
+import asyncio
+import json
+import sys
+
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic import make_dataset
+
+PAGE_SIZE: int = 10
+
+def encode_pages(dataset: dict, base_url: str) -> dict:
+	""" Encodes every page of every category of `dataset`.
+
+			Parameters:
+				dataset (dict): The records of every category, by category name
+				base_url (str): The url the stub is served at, such as `http://127.0.0.1:8765/api/`
+
+			Returns:
+				pages (dict): The encoded pages, by category name and page number
+	"""
+	pages: dict = {}
+
+	for category_name, records in dataset.items():
+		category_url: str = f'{base_url}{category_name}/'
+		page_count: int = max(1, -(-len(records) // PAGE_SIZE))
+		pages[category_name] = {}
+
+		for page_number in range(1, page_count + 1):
+			pages[category_name][page_number] = json.dumps({
+				'count': len(records),
+				'next': f'{category_url}?page={page_number + 1}' if page_number < page_count else None,
+				'previous': f'{category_url}?page={page_number - 1}' if page_number > 1 else None,
+				'results': records[(page_number - 1) * PAGE_SIZE : page_number * PAGE_SIZE]
+			}).encode()
+
+	return pages
+
+async def start_stub(dataset: dict, port: int = 0, latency: float = 0.0) -> tuple:
+	""" Starts serving `dataset` on `127.0.0.1`, on the running event loop.
+
+			Parameters:
+				dataset (dict): The records of every category, by category name
+				port (int): The port to listen on, any free port if `0` (DEFAULT: `0`)
+				latency (float): How long each response is held back, in seconds (DEFAULT: `0.0`)
+
+			Returns:
+				stub (tuple): The `web.AppRunner`, to clean up when done, and the base url of the stub
+	"""
+	pages: dict = {}
+
+	async def serve_page(request: web.Request) -> web.Response:
+		if latency > 0:
+			await asyncio.sleep(latency)
+
+		category_pages: dict = pages.get(request.match_info['category_name'])
+		page_number: str = request.query.get('page', '1')
+		body: bytes = category_pages.get(int(page_number)) if category_pages is not None and page_number.isdigit() else None
+
+		if body is None:
+			return web.json_response({'detail': 'Not found'}, status=404)
+
+		return web.Response(body=body, content_type='application/json')
+
+	app = web.Application()
+	app.router.add_get('/api/{category_name}/', serve_page)
+
+	runner = web.AppRunner(app)
+	await runner.setup()
+	site = web.TCPSite(runner, '127.0.0.1', port)
+	await site.start()
+
+	base_url: str = f'http://127.0.0.1:{runner.addresses[0][1]}/api/'
+	pages.update(encode_pages(dataset, base_url))
+
+	return runner, base_url
+
+async def serve(count: int, port: int, latency: float):
+	runner, base_url = await start_stub(make_dataset(count), port, latency)
+	print(f'Serving {count} records per category at {base_url}')
+
+	try:
+		await asyncio.Event().wait()
+	finally:
+		await runner.cleanup()
+
+if __name__ == '__main__':
+	count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+	port: int = int(sys.argv[2]) if len(sys.argv) > 2 else 8765
+	latency: float = int(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0
+
+	try:
+		asyncio.run(serve(count, port, latency))
+	except KeyboardInterrupt:
+		pass
@@ -0,0 +1,104 @@
+""" Synthetic SWAPI shaped data for the benchmarks: any number of records per category, with a value for every
+	column of `SCHEMA`, the `url` of each record, `homeworld` and `films` urls, the relationship url lists,
+	comma separated colour fields and the `created` and `edited` timestamps SWAPI adds, which aren't loaded.
+	Some values are `unknown` or `n/a`, so the consistency formatting has work to do.
+"""
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import script
+
+COLORS: list = ['blue', 'grey', 'brown', 'blond', 'n/a', 'unknown', 'blue, grey', 'brown, white, red']
+UNKNOWNS: list = ['unknown', 'n/a', 'none']
+
+def resource_url(category_name: str, number: int) -> str:
+	""" Returns the SWAPI url of the record `number` of `category_name`, such as `https://swapi.dev/api/planets/12/`. """
+	return f'{script.SWAPI_API_URL}{category_name}/{number}/'
+
+def column_value(category_name: str, column: dict, number: int, counts: dict):
+	""" Makes the value of `column` for the record `number` of `category_name`.
+
+			Parameters:
+				category_name (str): The name of the category
+				column (dict): The column in `SCHEMA`
+				number (int): The number of the record, from 1
+				counts (dict): The number of records of each category, so references point to existing records
+
+			Returns:
+				value: The value of the column
+	"""
+	column_name: str = column['column_name']
+	column_type: str = column['column_type']
+
+	if 'references' in column:
+		references: str = column['references']
+
+		if column_type.endswith('[]'):
+			return [resource_url(references, (number + offset) % counts[references] + 1) for offset in range(number % 4)]
+
+		return resource_url(references, number * 7 % counts[references] + 1)
+
+	if column['array_parse']:
+		return COLORS[(number + len(column_name)) % len(COLORS)]
+
+	if column_type.startswith('SMALLINT'):
+		return number
+
+	if column_type.startswith('DATE'):
+		return f'{1977 + number % 40}-05-25'
+
+	if column_name == 'name' or column_name == 'title':
+		return f'{category_name.capitalize()} {number}'
+
+	if number % 7 == 0:
+		return UNKNOWNS[number % len(UNKNOWNS)]
+
+	# The columns are at least VARCHAR(8) long
+	return str(number * 13 % 10000000)
+
+def make_entry(category_name: str, number: int, counts: dict) -> dict:
+	""" Makes the record `number` of `category_name`, see `column_value`.
+
+			Parameters:
+				category_name (str): The name of the category
+				number (int): The number of the record, from 1
+				counts (dict): The number of records of each category
+
+			Returns:
+				entry (dict): The record
+	"""
+	schema: dict = script.SCHEMA[category_name]
+	entry: dict = {'url': resource_url(category_name, number)}
+
+	for column in schema['columns']:
+		if schema['generated_key'] and column['column_name'] in schema['key']:
+			continue
+
+		entry[column['column_name']] = column_value(category_name, column, number, counts)
+
+	for relationship in schema['relationships']:
+		references: str = relationship['references']
+		entry[relationship['field']] = [resource_url(references, (number * 3 + offset) % counts[references] + 1) for offset in range(number % 3)]
+
+	entry['created'] = f'2014-12-{number % 28 + 1:02}T13:50:51.644000Z'
+	entry['edited'] = f'2014-12-{number % 28 + 1:02}T21:17:56.891000Z'
+
+	return entry
+
+def make_dataset(count: int) -> dict:
+	""" Makes `count` records for every category. There are never more films than a SMALLINT `episode_id`
+		can number.
+
+			Parameters:
+				count (int): The number of records per category
+
+			Returns:
+				dataset (dict): The records of every category, by category name
+	"""
+	counts: dict = {category_name: count for category_name in script.SCHEMA}
+	counts['films'] = min(count, 32767)
+
+	return {category_name: [make_entry(category_name, number, counts) for number in range(1, counts[category_name] + 1)]
+		for category_name in counts}
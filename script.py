@@ -1,14 +1,37 @@
 from logging import error
+from contextlib import contextmanager
 import pathlib
-from typing import Final
+from typing import Final, Iterator
 from pathlib import Path
 from sys import argv
 import sys
 import os
 import json
+import re
+import hashlib
+import mmap
+import struct
+import zlib
+from array import array
+import math
+import random
+import threading
+import multiprocessing
+import time
+import cProfile
+import pstats
+import io
+import tracemalloc
 import psycopg2
+from psycopg2.extras import execute_values
 import asyncio
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientConnectionError, ClientPayloadError, ClientTimeout, TCPConnector
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+from itertools import islice
+from operator import itemgetter
+from functools import lru_cache
+from datetime import datetime, timezone
 
 # Database info
 HOSTNAME: str = ''
@@ -45,13 +68,67 @@ VERBOSE: bool = False
 CACHE: bool = True
 FORCE_CACHE_UPDATE: bool = False
 CUSTOM_DATA: bool = False
+PAGE_CONCURRENCY: int = 1
+CATEGORY_CONCURRENCY: int = 6
+LOAD_METHOD: str = 'copy'
+LOAD_METHODS: Final[list] = ['copy', 'batch', 'insert']
+BATCH_SIZE: int = 500
+STREAM: bool = False
+QUEUE_SIZE: int = 4
+POOL_SIZE: int = 4
+TRANSFORM_WORKERS: int = 0
+CACHE_FORMAT: str = 'json'
+CACHE_FORMATS: Final[list] = ['json', 'binary']
+COMPRESS_CACHE: bool = False
+NDJSON_EXTENSIONS: Final[tuple] = ('.ndjson', '.jsonl')
+TABLE_MODE: str = 'reload'
+TABLE_MODES: Final[list] = ['reload', 'sync', 'swap']
+JUNCTIONS: bool = False
+COMPACT: bool = False
+FAST_LOAD: bool = False
+MAX_RETRIES: int = 5
+RATE_LIMIT: int = 0
+CONNECTION_LIMIT: int = 100
+HOST_CONNECTION_LIMIT: int = 0
+KEEPALIVE_TIMEOUT: int = 15
+DNS_CACHE_TTL: int = 10
+REQUEST_TIMEOUT: int = 30
+GZIP: bool = True
+METRICS_PATH: str = ''
+PROMETHEUS_PATH: str = ''
+PROFILE_DIRECTORY: str = ''
 
 SWAPI_API_URL: Final[str] = 'https://swapi.dev/api/'
+BINARY_CACHE_MAGIC: Final[bytes] = b'SWAPIC'
+BINARY_CACHE_VERSION: Final[int] = 1
+BINARY_CACHE_COMPRESSED: Final[int] = 1
+RETRY_BASE_DELAY: Final[float] = 0.5
+PROFILE_TOP: Final[int] = 15
+TRANSFORM_CHUNK_SIZE: Final[int] = 5000
+SWAP_SCHEMA: Final[str] = 'swapi_staging'
+SWAP_LOCK_TIMEOUT: Final[str] = '5s'
+ARRAY_CACHE_SIZE: Final[int] = 4096
 # CATEGORY_NAMES: list = ['films', 'people', 'planets', 'species', 'starships', 'vehicles']
 CATEGORY_NAMES: list = ['people']
 FILM_TITLES: Final[list] = ['A New Hope', 'The Empire Strikes Back', 'Return of the Jedi', 'The Phantom Menace', 'Attack of the Clones', 'Revenge of the Sith']
-PLANET_NAMES: list = []
+FILM_EPISODE_IDS: Final[list] = [4, 5, 6, 1, 2, 3]
+ENTITY_INDEX: dict = {}
+REFRESH_NAMES: list = []
 DATA: dict = {}
+CACHED_PAGES: dict = {}
+PAGE_VALIDATORS: dict = {}
+CACHED_SHARD_PATHS: dict = {}
+CACHED_SHARDS: dict = {}
+NOT_MODIFIED_PAGES: int = 0
+RETRIED_REQUESTS: int = 0
+THROTTLED_RESPONSES: int = 0
+RATE_LIMITER = None
+METRICS: dict = {}
+METRICS_LOCK = threading.Lock()
+PROFILES: dict = {}
+CONNECTION_TABLES: dict = {}
+TRANSFORM_EXECUTOR: ProcessPoolExecutor = None
+TRANSFORM_EXECUTOR_LOCK = threading.Lock()
 SCHEMA: dict = {
 	'films': { 
 		'header': "",
@@ -60,6 +137,10 @@ SCHEMA: dict = {
 		'key': [
 			'episode_id'
 		],
+		'natural_key': [
+			'episode_id'
+		],
+		'relationships': [],
 		'columns': [
 			{
 				'column_name': 'episode_id',
@@ -101,6 +182,27 @@ SCHEMA: dict = {
 		'key': [
 			'id'
 		],
+		'natural_key': [
+			'name'
+		],
+		'relationships': [
+			{
+				'field': 'films',
+				'references': 'films'
+			},
+			{
+				'field': 'species',
+				'references': 'species'
+			},
+			{
+				'field': 'vehicles',
+				'references': 'vehicles'
+			},
+			{
+				'field': 'starships',
+				'references': 'starships'
+			}
+		],
 		'columns': [
 			{
 				'column_name': 'id',
@@ -150,12 +252,16 @@ SCHEMA: dict = {
 			{
 				'column_name': 'homeworld',
 				'column_type': 'VARCHAR(50)',
-				'array_parse': False
+				'array_parse': False,
+				'references': 'planets',
+				'reference_field': 'name'
 			},
 			{
 				'column_name': 'films',
 				'column_type': 'text[]',
-				'array_parse': False
+				'array_parse': False,
+				'references': 'films',
+				'reference_field': 'title'
 			}
 		]
 	},
@@ -166,6 +272,15 @@ SCHEMA: dict = {
 		'key': [
 			'id'
 		],
+		'natural_key': [
+			'name'
+		],
+		'relationships': [
+			{
+				'field': 'films',
+				'references': 'films'
+			}
+		],
 		'columns': [
 			{
 				'column_name': 'id',
@@ -226,6 +341,15 @@ SCHEMA: dict = {
 		'key': [
 			'id'
 		],
+		'natural_key': [
+			'name'
+		],
+		'relationships': [
+			{
+				'field': 'films',
+				'references': 'films'
+			}
+		],
 		'columns': [
 			{
 				'column_name': 'id',
@@ -270,7 +394,9 @@ SCHEMA: dict = {
 			{
 				'column_name': 'homeworld',
 				'column_type': 'VARCHAR(50)',
-				'array_parse': False
+				'array_parse': False,
+				'references': 'planets',
+				'reference_field': 'name'
 			},
 			{
 				'column_name': 'language',
@@ -286,6 +412,15 @@ SCHEMA: dict = {
 		'key': [
 			'id'
 		],
+		'natural_key': [
+			'name'
+		],
+		'relationships': [
+			{
+				'field': 'films',
+				'references': 'films'
+			}
+		],
 		'columns': [
 			{
 				'column_name': 'id',
@@ -366,6 +501,15 @@ SCHEMA: dict = {
 		'key': [
 			'id'
 		],
+		'natural_key': [
+			'name'
+		],
+		'relationships': [
+			{
+				'field': 'films',
+				'references': 'films'
+			}
+		],
 		'columns': [
 			{
 				'column_name': 'id',
@@ -431,414 +575,3033 @@ SCHEMA: dict = {
 	},
 }
 
-def extract_planet_names():
-	planets = DATA['planets']
-
-	for planet in planets:
-		PLANET_NAMES.append(planet['name'])
+def referenced_categories(category_name) -> set:
+	""" Returns the names of the categories the columns of `category_name` reference, such as `planets` for 
+		a `homeworld` column, and, with `JUNCTIONS`, the categories whose keys its junction tables look up.
 
-async def fetch_category(session: ClientSession, category_name: str):
-	""" Fetches the category data, from the SWAPI endpoint of name `category_name`, and 
-		appends it to the DATA dictionary.
+			Parameters:
+				category_name (str): The name of the category
 
-		Parameters:
-			session (ClientSession): The app's Psycopg2 session
-			category_name (str): The name of the category you wish to fetch
+			Returns:
+				category_names (set): The names of the referenced categories
 	"""
-	catergory_entries: list = []
+	referenced_names: set = {column['references'] for column in SCHEMA[category_name]['columns'] if 'references' in column}
 
-	await fetch_page(session, SWAPI_API_URL + category_name + '/', catergory_entries)
+	# The junction tables only look up the keys that can't be read from the url
+	if JUNCTIONS:
+		referenced_names |= {relationship['references'] for relationship in SCHEMA[category_name]['relationships'] 
+			if not SCHEMA[relationship['references']]['generated_key']}
 
-	DATA[category_name] = catergory_entries
+	return referenced_names
 
-	if VERBOSE:
-		print(DATA[category_name])
+def index_entities(entries):
+	""" Adds `entries` to `ENTITY_INDEX`, keyed by their resource url.
 
-async def fetch_page(session: ClientSession, url: str, container: list):
-	""" Fetches a page of data for a particular category. If there is another page, then 
-		it'll automatically recursively call `fetch_page()` until all the pages are collected
-		and appended to the passed container.
-		
+			Parameters:
+				entries (list): The entries of a category, each with its `url`
+	"""
+	for entry in entries:
+		ENTITY_INDEX[entry['url']] = entry
 
-		Parameters:
-			session (ClientSession): The app's Psycopg2 session
-			container (str): The container to append the new page to
+def build_entity_index(category_names: list):
+	""" Builds `ENTITY_INDEX`, the resource url to entity index the reference columns resolve through, from 
+		the categories in DATA that are referenced by one of `category_names`. The films are seeded from 
+		`FILM_TITLES` first, as they're referenced by most categories but rarely fetched.
+		Categories that aren't referenced aren't indexed, so cached or custom data that's read lazily stays 
+		on disk.
+
+			Parameters:
+				category_names (list): The names of the categories that are going to be loaded
 	"""
-	async with session.get(url) as response:
-		if response.status != 200:
-			error("Encountered a problem: %s", response.status)
-			return 
+	for index, title in enumerate(FILM_TITLES):
+		url: str = f'{SWAPI_API_URL}films/{index + 1}/'
+		ENTITY_INDEX[url] = {'title': title, 'episode_id': FILM_EPISODE_IDS[index], 'url': url}
 
-		results = await response.json()
+	referenced_names: set = set()
 
-		for entry in results['results']:
-			container.append(entry)
+	for category_name in category_names:
+		referenced_names |= referenced_categories(category_name)
 
-		next_page = results['next']
-		if next_page != None:
-			await fetch_page(session, next_page, container)
+	for category_name in referenced_names:
+		if category_name in DATA:
+			index_entities(DATA[category_name])
 
-def write_to_file(filename: str, path: str):
-	""" Caches the fetched data at path/filename.json. If the path does not exist, it will be created.
+def record_metrics(phase: str, category_name: str = None, **values):
+	""" Adds `values`, such as `seconds=0.5, rows=82`, to the metrics of `phase`, or of `category_name` 
+		within `phase`. Values recorded more than once, such as the bytes of every page, add up. The phases 
+		are `fetch`, `cache_read`, `cache_write`, `transform` and `load`, plus `create_table`, `primary_key` and `set_logged` 
+		with `FAST_LOAD` and `swap` with the `swap` table mode, and the loads run on worker threads, hence the lock.
 
 			Parameters:
-				filename (str): The root name of the exported file (DEFAULT: `swapi_data`)
-				path (str): The path to the directory of the exported file (DEFAULT: `./bin/`)
+				phase (str): The name of the phase
+				category_name (str): The name of the category, or `None` for the whole phase (DEFAULT: `None`)
+				values (dict): The values to add
 	"""
+	with METRICS_LOCK:
+		metrics: dict = METRICS.setdefault(phase, {'categories': {}})
 
-	if not Path(path).exists():
-		pathlib.Path(path).mkdir(parents=True, exist_ok=True)
+		if category_name is not None:
+			metrics = metrics['categories'].setdefault(category_name, {})
 
-	with open(path + '/' + filename + '.json', 'w') as target_file:
-		json.dump(DATA, target_file, indent=4)
+		for name, value in values.items():
+			metrics[name] = metrics.get(name, 0) + value
 
-def read_from_file(filename: str, path: str):
-	""" Reads the cached data at path/filename.json. 
+def category_metrics(phase: str, category_name) -> dict:
+	""" Returns a copy of the metrics of `category_name` within `phase` recorded so far, such as 
+		`{'seconds': 0.5, 'rows': 82}`, or an empty dict if there are none.
 
 			Parameters:
-				filename (str): The root name of the exported file (DEFAULT: `swapi_data`)
-				path (str): The path to the directory of the exported file (DEFAULT: `./bin/`)
-	"""
-	global DATA
-	with open(path + '/' + filename + '.json') as target_file:
-		DATA = json.load(target_file)
-
-def read_from_path(path: str):
-	""" Reads the cached data at path. 
+				phase (str): The name of the phase
+				category_name (str): The name of the category
 
-			Parameters:
-				path (str): The path to the exported file (DEFAULT: `./bin/swapi_data.json`)
+			Returns:
+				values (dict): The values recorded so far
 	"""
-	global DATA
-	with open(path) as target_file:
-		DATA = json.load(target_file)
+	with METRICS_LOCK:
+		return dict(METRICS.get(phase, {'categories': {}})['categories'].get(category_name, {}))
 
-def build_columns(category_name) -> str:
-	""" Builds the table column insert headers, insert value pattern, and CREATE TABLE column declarations
-		for the table for `category_name`.
-		Returns the CREATE TABLE column declarations.
+def build_metrics_report(success: bool, seconds: float) -> dict:
+	""" Builds the metrics report of the run, working out the rows per second of every phase and category.
 
 			Parameters:
-				category_name (str): The name of the category to build to columns for
+				success (bool): Whether the run loaded every table
+				seconds (float): The wall time of the whole run
 
 			Returns:
-				column_decl (str): The column declarations for a CREATE TABLE statement
+				report (dict): The report
 	"""
-	global SCHEMA
+	phases: dict = {}
 
-	generated_key: bool = SCHEMA[category_name]['generated_key']
-	key: list = SCHEMA[category_name]['key']
-	has_primary_key: bool = True if len(key) > 0 else False
-	column_types: list = SCHEMA[category_name]['columns']
-	column_decl: str = ''
-	column_header: str = ''
-	column_format: str = ''
-	value: str = '%s'
-	type_count: int = len(column_types)
+	def rounded(values: dict) -> dict:
+		return {name: round(value, 6) if isinstance(value, float) else value for name, value in values.items()}
 
-	for index, col in enumerate(column_types):
-		name: str = col['column_name']
-		column_type: str = col['column_type']
-		column_decl += ' ' + name + ' ' + column_type
-		
-		not_end: bool = index + 1 < type_count
+	for phase, metrics in METRICS.items():
+		phases[phase] = rounded(metrics)
+		phases[phase]['categories'] = {}
 
-		if not_end or has_primary_key:
-			column_decl += ','
+		for category_name, values in metrics['categories'].items():
+			values = rounded(values)
 
+			if values.get('rows', 0) > 0 and values.get('seconds', 0) > 0:
+				values['rows_per_second'] = round(values['rows'] / values['seconds'], 1)
 
-		if not generated_key or (generated_key and not name in key):
-			column_header += name
+			phases[phase]['categories'][category_name] = values
 
-			if column_type.startswith('DATE'):
-				column_format += f'CAST({value} AS DATE)'
-			elif column_type.startswith('SMALLINT'):
-				column_format += f'CAST({value} AS SMALLINT)'
-			else:
-				column_format += value
+	return {
+		'created': datetime.now(timezone.utc).isoformat(),
+		'success': success,
+		'seconds': round(seconds, 6),
+		'phases': phases
+	}
 
-			if not_end:
-				column_header += ', '
-				column_format += ', '
+def write_prometheus_textfile(report: dict, file_path: str):
+	""" Writes the metrics report in the Prometheus text format, for the node exporter's textfile 
+		collector. The file is written next to its destination and moved into place, so the collector never 
+		reads half of it.
 
-	SCHEMA[category_name]['header'] = column_header
-	SCHEMA[category_name]['value_format'] = column_format
+			Parameters:
+				report (dict): The report, from `build_metrics_report`
+				file_path (str): The path of the textfile, such as `/var/lib/node_exporter/swapi.prom`
+	"""
+	descriptions: dict = {
+		'seconds': 'Wall time of a phase of the last run, in seconds',
+		'rows': 'Rows handled by a phase of the last run',
+		'rows_per_second': 'Rows per second of a phase of the last run',
+		'bytes': 'Bytes fetched, read or written by a phase of the last run',
+		'requests': 'HTTP requests sent by a phase of the last run'
+	}
+	lines: list = [
+		'# HELP swapi_run_success Whether the last run loaded every table',
+		'# TYPE swapi_run_success gauge',
+		f'swapi_run_success {1 if report["success"] else 0}',
+		'# HELP swapi_run_seconds Wall time of the last run, in seconds',
+		'# TYPE swapi_run_seconds gauge',
+		f'swapi_run_seconds {report["seconds"]}',
+		'# HELP swapi_run_timestamp_seconds When the last run finished, as a Unix timestamp',
+		'# TYPE swapi_run_timestamp_seconds gauge',
+		f'swapi_run_timestamp_seconds {time.time():.0f}'
+	]
+
+	for name, description in descriptions.items():
+		samples: list = []
+
+		for phase, metrics in report['phases'].items():
+			if name in metrics:
+				samples.append(f'swapi_phase_{name}{{phase="{phase}",category=""}} {metrics[name]}')
+
+			for category_name, values in metrics['categories'].items():
+				if name in values:
+					samples.append(f'swapi_phase_{name}{{phase="{phase}",category="{category_name}"}} {values[name]}')
+
+		if len(samples) > 0:
+			lines += [f'# HELP swapi_phase_{name} {description}', f'# TYPE swapi_phase_{name} gauge'] + samples
+
+	with open(file_path + '.tmp', 'w') as target_file:
+		target_file.write('\n'.join(lines) + '\n')
+
+	os.replace(file_path + '.tmp', file_path)
+
+def export_metrics(success: bool, seconds: float):
+	""" Writes the metrics report to `METRICS_PATH` as JSON and to `PROMETHEUS_PATH` as a Prometheus 
+		textfile, for whichever of them is set.
 
-	return column_decl
+			Parameters:
+				success (bool): Whether the run loaded every table
+				seconds (float): The wall time of the whole run
+	"""
+	if METRICS_PATH == '' and PROMETHEUS_PATH == '':
+		return
 
-def create_table(cursor, table_name) -> bool:
-	""" Creates the table with the specified `table_name` and column declarations from `build_columns`. 
-		Returns `True` or `False`, if the table creation was successful or not.
+	report: dict = build_metrics_report(success, seconds)
 
-			Parameters:
-				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
-				table_name (str): The name of the table, typically the same as the category name
+	try:
+		if METRICS_PATH != '':
+			with open(METRICS_PATH, 'w') as target_file:
+				json.dump(report, target_file, indent=2)
 
-			Returns:
-				`True` or `False, if the table creation was successful or not
+		if PROMETHEUS_PATH != '':
+			write_prometheus_textfile(report, PROMETHEUS_PATH)
+
+	except OSError as err:
+		print('An exception occurred while writing the metrics: ', err)
+
+@contextmanager
+def profile_phase(phase: str):
+	""" Runs the body of the `with` statement under the CPU profiler and tracemalloc of `phase`, if 
+		profiling. The phases are `fetch`, `cache_io`, `ddl` (`build_columns`/`create_table`), `transform` 
+		(`build_rows`) and `db` (the statements that load the rows). A phase run more than once, such as 
+		once per category, adds up into the same profile. Phases must not be nested.
+
+			Parameters:
+				phase (str): The name of the phase
 	"""
-	try:
-		# Delete a previous iteration of the table, if exists
-		drop_table_query: str = f'''
-		DROP TABLE IF EXISTS {table_name};
-		'''
-		cursor.execute(drop_table_query)
+	if PROFILE_DIRECTORY == '':
+		yield
+		return
 
+	profile: dict = PROFILES.setdefault(phase, {'profiler': cProfile.Profile(), 'allocations': {}, 'peak': 0})
+	# Forget the allocations of earlier phases, so the snapshot at the end only holds the ones of this phase
+	tracemalloc.clear_traces()
+	profile['profiler'].enable()
+
+	try:
+		yield
 
-		column_decls: str = build_columns(table_name)
-		comp_key: str = 'PRIMARY KEY ('
+	finally:
+		profile['profiler'].disable()
+		profile['peak'] = max(profile['peak'], tracemalloc.get_traced_memory()[1])
+		snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+		for statistic in snapshot.statistics('lineno'):
+			site: str = str(statistic.traceback)
+			size, count = profile['allocations'].get(site, (0, 0))
+			profile['allocations'][site] = (size + statistic.size, count + statistic.count)
+
+def write_profiles():
+	""" Saves the CPU profile of every phase to `PROFILE_DIRECTORY`/<phase>.prof, for `pstats` or snakeviz, and 
+		a summary.txt of the `PROFILE_TOP` hottest functions and allocation sites of every phase.
+	"""
+	Path(PROFILE_DIRECTORY).mkdir(parents=True, exist_ok=True)
+	summary: io.StringIO = io.StringIO()
 
-		key: list = SCHEMA[table_name]['key']
-		sub_key_count: int = len(key)
+	for phase, profile in PROFILES.items():
+		profile['profiler'].dump_stats(os.path.join(PROFILE_DIRECTORY, phase + '.prof'))
 
-		if sub_key_count > 1:
-			for index, key_part in enumerate(key):
-				comp_key += key_part
+		summary.write(f'=== {phase}: peak traced memory {profile["peak"] / 1024:,.0f} KiB ===\n')
+		pstats.Stats(profile['profiler'], stream=summary).sort_stats('cumulative').print_stats(PROFILE_TOP)
 
-				if index + 1 < sub_key_count:
-					comp_key += ', '
-			comp_key += ')'
-		elif sub_key_count == 1:
-			comp_key += key[0]
-			comp_key += ')'
-		elif sub_key_count == 0:
-			comp_key = ''
+		summary.write(f'Top {PROFILE_TOP} allocation sites, by the memory still held at the end of the phase:\n')
+		allocations: list = sorted(profile['allocations'].items(), key=lambda allocation: allocation[1][0], reverse=True)
 
-		create_table_query: str = f'''CREATE TABLE {table_name} (
-			{column_decls}
-			{comp_key}
-		);'''
+		for site, (size, count) in allocations[:PROFILE_TOP]:
+			summary.write(f'\t{size / 1024:>10,.1f} KiB\t{count:>8} blocks\t{site}\n')
 
-		# print(create_table_query)
+		summary.write('\n')
 
-		cursor.execute(create_table_query)
+	summary_path: str = os.path.join(PROFILE_DIRECTORY, 'summary.txt')
 
-		return True
+	with open(summary_path, 'w') as target_file:
+		target_file.write(summary.getvalue())
 
-	except Exception as err:
-		print('An exception occurred while creating the table: ', err)
-		return False
+	print('Profiles written to: ' + summary_path)
 
-def populate_table(cursor, category_name) -> bool:
-	""" Populates the table with the name that matches `category_name` with the fetched or cached data.
-		Returns `True` or `False`, if the table population was successful or not.
+def url_category(url: str) -> str:
+	""" Returns the name of the category of a SWAPI url, such as `people` for `https://swapi.dev/api/people/?page=2`. """
+	return url[len(SWAPI_API_URL):].split('/', 1)[0]
 
-			Parameters:
-				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
-				category_name (str): The name of the table to populate
+def make_session() -> ClientSession:
+	""" Makes the HTTP session every request is sent on, from the transport settings: the total and per 
+		host connection limits, how long an idle connection is kept alive, how long DNS look ups are cached, 
+		the timeout of each request and whether compressed responses are accepted.
+		Responses aren't decompressed by the session, so `fetch_json` can tell how many bytes were on the wire.
 
-			Returns:
-				Returns `True` or `False`, if the table population was successful or not.
+		Returns:
+			session (ClientSession): The app's aiohttp session
 	"""
-	schema:dict = SCHEMA[category_name]
-	collection: list = DATA[category_name]
-	has_generated_key: bool = schema['generated_key']
-	key: list = schema['key']
-	insert_row_query: str = f'''INSERT INTO {category_name} ({schema['header']}) VALUES ({schema['value_format']});'''
+	connector_options: dict = {
+		'limit': CONNECTION_LIMIT,
+		'limit_per_host': HOST_CONNECTION_LIMIT,
+		'use_dns_cache': DNS_CACHE_TTL > 0,
+		'ttl_dns_cache': DNS_CACHE_TTL if DNS_CACHE_TTL > 0 else None
+	}
+
+	if KEEPALIVE_TIMEOUT > 0:
+		connector_options['keepalive_timeout'] = KEEPALIVE_TIMEOUT
+	else:
+		connector_options['force_close'] = True
 
-	# Formatting
-	unknown: str = 'unknown'
-	none: str = 'none'
-	na: str = 'n/a'
-	null: str = 'NULL'
-	upper_na: str = 'N/A'
+	return ClientSession(
+		connector=TCPConnector(**connector_options),
+		timeout=ClientTimeout(total=REQUEST_TIMEOUT),
+		headers={'Accept-Encoding': 'gzip, deflate' if GZIP else 'identity'},
+		auto_decompress=False
+	)
 
-	try:
-		for entry in collection:
-			data: tuple = ()
+def decode_body(body: bytes, encoding: str) -> bytes:
+	""" Decompresses a response body sent with the `encoding` Content-Encoding.
 
-			for column in schema['columns']:
-				column_name: str = column['column_name']
+		Parameters:
+			body (bytes): The body as it was received
+			encoding (str): The Content-Encoding of the response, if any
 
-				if has_generated_key and column_name in key:
-					continue
+		Returns:
+			body (bytes): The decompressed body
+	"""
+	if encoding == 'gzip' or encoding == 'deflate':
+		try:
+			# Detects the gzip or zlib header on its own
+			return zlib.decompress(body, 32 + zlib.MAX_WBITS)
+		except zlib.error:
+			# Some servers send deflate without the zlib header
+			return zlib.decompress(body, -zlib.MAX_WBITS)
 
-				entry_data = entry[column_name]
+	return body
 
-				# Make the columns with 'unknown's consistent
-				if FORMAT:
-					data_type: str = type(entry_data).__name__
-					if data_type == "str":
-						if entry_data == unknown or entry_data == none or entry_data == upper_na or entry_data == na:
-							entry_data = null
-					elif data_type == "list":
-						for element in entry_data:
-							if type(element).__name__ == "str":
-								if element == unknown or element == none or element == upper_na or entry_data == na:
-									element = null
+async def fetch_categories(session: ClientSession, category_names: list) -> bool:
+	""" Fetches every category in `category_names` concurrently on the shared session, with at most
+		`CATEGORY_CONCURRENCY` categories in flight, printing each category's progress and timing.
+		Returns `True` or `False`, if every category was fetched completely or not.
 
-				
-				is_null: bool =  entry_data == 'NULL'
+		Parameters:
+			session (ClientSession): The app's aiohttp session
+			category_names (list): The names of the categories you wish to fetch
 
-				if column_name == 'films':
-					arr_data: str = "{ "
-					filmCount = len(entry_data)
-					for index, film in enumerate(entry_data):
-						film_number_index: int = film.index('films/') + 6
-						film_number: int = int(film[film_number_index])
-						film_name: str = FILM_TITLES[film_number - 1]
+		Returns:
+			Returns `True` or `False`, if every category was fetched completely or not.
+	"""
+	semaphore = asyncio.Semaphore(CATEGORY_CONCURRENCY)
 
-						arr_data += f'{film_name}'
+	async def fetch_timed_category(category_name: str) -> bool:
+		async with semaphore:
+			print(f'Fetching {category_name}..')
+			start: float = time.perf_counter()
 
-						if index + 1 < filmCount:
-							arr_data += ', '
+			if not await fetch_category(session, category_name):
+				return False
 
-					arr_data += " }"
-					entry_data = arr_data
+			elapsed: float = time.perf_counter() - start
+			print(f'Fetched {len(DATA[category_name])} {category_name} records in {elapsed:.2f}s')
 
-				elif column_name == 'homeworld':
-					planet_number_index: int = entry_data.index('planets/') + 8
-					planet_number: int = int(entry_data[planet_number_index])
-					planet_name: str = PLANET_NAMES[planet_number - 1]
+			record_metrics('fetch', category_name, seconds=elapsed, rows=len(DATA[category_name]))
 
-					entry_data = f'{planet_name}'
+			return True
 
-				elif column['array_parse']:
-					# parse this field into an array
-					# , as a delimiter
-					arr_data: str = ''
+	results: list = await asyncio.gather(*[fetch_timed_category(name) for name in category_names])
 
-					if not is_null:
-						arr_data = '{ '
-					
-					commaCount = entry_data.count(',')
-				
-					if commaCount > 0:
-						field: str = ''
-						left_index: int = 0
-						right_index: int = 0
-						length: int = len(entry_data)
+	return all(results)
 
-						while True:
-							end: bool = length < right_index + 1
-							if end or entry_data[right_index] == ',':
-								field = entry_data[left_index : right_index]
-								arr_data += f'"{field}"'
-								
-								if not end:
-									arr_data += ', '
-									left_index = right_index + 1
+async def fetch_category(session: ClientSession, category_name: str) -> bool:
+	""" Fetches the category data, from the SWAPI endpoint of name `category_name`, and 
+		appends it to the DATA dictionary.
+		Returns `True` or `False`, if the whole category was fetched or not.
 
-									while entry_data[left_index] == ' ':
-										left_index += 1
+		Parameters:
+			session (ClientSession): The app's Psycopg2 session
+			category_name (str): The name of the category you wish to fetch
 
-									right_index =  left_index + 1
+		Returns:
+			Returns `True` or `False`, if the whole category was fetched or not.
+	"""
+	catergory_entries: list = []
 
-								else:
-									break
+	if not await fetch_category_pages(session, category_name, catergory_entries):
+		return False
 
-							else:
-								right_index += 1
+	DATA[category_name] = catergory_entries
 
-					else:
-						arr_data += f'{entry_data}'
+	if VERBOSE:
+		print(DATA[category_name])
 
-					if not is_null:
-						arr_data += ' }'
-					else:
-						arr_data = None
+	return True
 
-					entry_data = arr_data
+async def fetch_category_pages(session: ClientSession, category_name: str, container) -> bool:
+	""" Fetches every page of the category `category_name` into the passed container, either one page 
+		after another or concurrently, depending on `PAGE_CONCURRENCY`.
+		Returns `True` or `False`, if every page was fetched or not.
 
-				elif is_null:
-					entry_data = None
+		Parameters:
+			session (ClientSession): The app's aiohttp session
+			category_name (str): The name of the category you wish to fetch
+			container (list | asyncio.Queue): The container to store the pages in, see `store_page`
 
-				data += (entry_data,)
+		Returns:
+			Returns `True` or `False`, if every page was fetched or not.
+	"""
+	category_url: str = SWAPI_API_URL + category_name + '/'
 
-			# print(insert_row_query % (data[0], data[1], data[2], data[3], data[4], data[5], data[6], data[7], data[8], data[9]))
-			cursor.execute(insert_row_query, data)
-		return True
+	if PAGE_CONCURRENCY > 1:
+		return await fetch_pages_concurrently(session, category_url, container)
 
-	except Exception as err:
-		print('An exception occurred while inserting a row into the table: ', err)
-		return False
+	return await fetch_pages_sequentially(session, category_url, container)
 
-def print_help():
-	""" Prints out the help menu to the terminal. """
+async def store_page(container, entries: list):
+	""" Stores the entries of a fetched page in the passed container. A list is extended with the entries, 
+		while a queue is handed the whole page, waiting for room if the queue is full.
 
-	print('Usage: python ./script.py ([options])')
-	print('Example:')
-	print('\tpython ./script.py -db=some_database')
-	print('\tpython ./script.py -p=5433')
-	print('\tpython ./script.py -c=false')
-	print('\tpython ./script.py -d="./bin/custom_data.json"')
-	print('\tpython ./script.py -f')
-	print('\tpython ./script.py --cache=false')
-	print('\tpython ./script.py --force')
-	print('\tpython ./script.py --format=false')
-	print('\tpython ./script.py -c=false -v -fmt=false')
-	print('\tpython ./script.py -c=false --verbose')
-	print('\tpython ./script.py --cache=false --verbose')
-	print('\tpython ./script.py --data="./bin/some_custom_data.json"')
-	print('\n')
-	print('Options:')
-	print('-db, --database\t\tName of the database to connect to (DEFAULT="bootcamp")')
-	print('\t\t\t\t-db=some_db')
-	print('\t\t\t\t-database=some_other_db')
-	print('-h, --host\t\tThe host to connect to (DEFAULT=localhost)')
-	print('\t\t\t\t-h="localhost"')
-	print('\t\t\t\t--host="localhost"')
-	print('-u, --user\t\tThe postgres user(DEFAULT=BOOTCAMP_USER[Environment Variable]')
-	print('\t\t\t\t-u=some-user')
-	print('\t\t\t\t--user=other-user')
-	print('-pw, --password\t\tThe password to the postgres user(DEFAULT=BOOTCAMP_CREDS[Environment Variable]')
-	print('\t\t\t\t-pw="$0m3P@$$w0rd"')
-	print('\t\t\t\t--password="$0m3P@$$w0rd"')
-	print('-p, --port\t\tThe port to connect to (DEFAULT=5432)')
-	print('\t\t\t\t-p=5433')
-	print('\t\t\t\t--port=5434')
-	print('-d, --data\t\tUse a modified version of the dataset')
-	print('\t\t\t\t-d="./bin/custom_data.json"')
-	print('\t\t\t\t--data="./bin/some_custom_data.json"')
-	print('-c, --cache\t\tWhether or not to cache and use the cached results (Default=true)')
-	print('\t\t\tDisable caching and the use of any existing cache:')
-	print('\t\t\t\t-c=false')
-	print('\t\t\t\t--cache=false')
-	print('-fmt, --format\t\tFormat the fields to be consistent (DEFAULT=true)')
-	print('\t\t\t\t-fmt=false')
-	print('\t\t\t\t--format=false')
-	print('\t\t\tDisable consistency formatting:')
-	print("-f, --force\t\tForce a cache update")
-	print('-v, --verbose\t\tPrints out detailed information of the process')
-	print('')
-	print('General Options: ')
-	print('-h, --help\t\tPrint usage information')
+		Parameters:
+			container (list | asyncio.Queue): The container to store the page in
+			entries (list): The entries of the page
+	"""
+	if isinstance(container, asyncio.Queue):
+		await container.put(entries)
+	else:
+		container.extend(entries)
 
-async def main():
-	global VERBOSE, FORCE_CACHE_UPDATE, CACHE, FORMAT, DATABASE, CUSTOM_DATA, PORT_ID, HOSTNAME, PWD, USERNAME
-	filename: str = 'swapi_data'
-	bin_location: str = './bin'
-	custom_data_path: str = ''
+class RateLimiter:
+	""" A token bucket shared by every request, which lets through at most `rate` requests per second on 
+		average, in bursts of up to `rate` requests.
+	"""
 
-	# Handle args
-	if '-h' in argv or '--help' in argv:
-		print_help()
+	def __init__(self, rate: int):
+		self.rate: int = rate
+		self.tokens: float = rate
+		self.updated: float = time.monotonic()
+		self.lock = asyncio.Lock()
+
+	async def acquire(self):
+		# The lock makes the waiting requests take their turns in order
+		async with self.lock:
+			while True:
+				now: float = time.monotonic()
+				self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+				self.updated = now
+
+				if self.tokens >= 1:
+					self.tokens -= 1
+					return
 
-		return
+				await asyncio.sleep((1 - self.tokens) / self.rate)
 
-	arg_len: int = len(argv)
+def retry_delay(attempt: int, retry_after: str = None) -> float:
+	""" Works out how long to wait before retrying a request: a random delay of up to `RETRY_BASE_DELAY` 
+		seconds, doubling with every attempt, but never less than the server's `Retry-After`.
 
-	if arg_len > 1:
-		for i, arg in enumerate(argv):
-			la: str = arg.lower()
+		Parameters:
+			attempt (int): The number of attempts that failed so far, minus one
+			retry_after (str): The `Retry-After` header of the response, if any
 
-			if '-v' == la or '--verbose' == la:
-				VERBOSE = True
+		Returns:
+			delay (float): The number of seconds to wait
+	"""
+	delay: float = random.uniform(0, RETRY_BASE_DELAY * 2 ** attempt)
 
-			elif la.startswith('-c=') or la.startswith('--cache='):
-				count: int = la.count('=')
-				
-				if count == 1:
-					index: int = la.index('=') + 1
-					value: str = la[index:].lower()
+	if retry_after is not None and retry_after.isdigit():
+		delay = max(delay, float(retry_after))
 
-					if (value == 'false' or value == 'f'):
-						CACHE = False
+	return delay
 
-					elif (value == 'true' or value == 't'):
-						print('Redundant cache flag as caching is on by default')
+async def fetch_json(session: ClientSession, url: str):
+	""" Fetches a single page of data at `url`.
+		If the page was cached along with an ETag or Last-Modified validator, the request is made 
+		conditional and a `304 Not Modified` response rebuilds the page from the cached category, see 
+		`cached_page_contents`.
+		Throttled (429) and server error (5xx) responses, time outs, dropped connections and truncated or 
+		corrupt bodies (that can't be decompressed or decoded) are retried up to `MAX_RETRIES` times, with a jittered exponential backoff, see `retry_delay`. Every attempt waits 
+		for `RATE_LIMITER`, if there's a rate limit.
+		Returns the decoded page, or `None` if the request was unsuccessful.
 
-					else:
+		Parameters:
+			session (ClientSession): The app's aiohttp session
+			url (str): The url of the page to fetch
+
+		Returns:
+			results (dict): The decoded page, or `None` if the request was unsuccessful
+	"""
+	global NOT_MODIFIED_PAGES, RETRIED_REQUESTS, THROTTLED_RESPONSES
+	headers: dict = {}
+	cached_page: dict = CACHED_PAGES.get(url)
+
+	if cached_page is not None:
+		if cached_page['etag'] is not None:
+			headers['If-None-Match'] = cached_page['etag']
+
+		if cached_page['last_modified'] is not None:
+			headers['If-Modified-Since'] = cached_page['last_modified']
+
+	for attempt in range(MAX_RETRIES + 1):
+		retry_after: str = None
+
+		if RATE_LIMITER is not None:
+			await RATE_LIMITER.acquire()
+
+		start: float = time.perf_counter()
+
+		try:
+			async with session.get(url, headers=headers) as response:
+				if response.status == 304 and cached_page is not None:
+					record_metrics('fetch', url_category(url), requests=1)
+
+					if VERBOSE:
+						print(f'GET {url} 304 in {(time.perf_counter() - start) * 1000:.0f}ms')
+
+					NOT_MODIFIED_PAGES += 1
+					PAGE_VALIDATORS[url] = dict(cached_page, records=cached_page['end'] - cached_page['start'])
+
+					return cached_page_contents(url, cached_page)
+
+				if response.status == 200:
+					body: bytes = await response.read()
+					encoding: str = response.headers.get('Content-Encoding')
+					decoded: bytes = decode_body(body, encoding)
+
+					record_metrics('fetch', url_category(url), requests=1, bytes=len(body))
+
+					if VERBOSE:
+						elapsed: float = (time.perf_counter() - start) * 1000
+						print(f'GET {url} {response.status} in {elapsed:.0f}ms, {len(body)} bytes ({encoding or "identity"}), {len(decoded)} decoded')
+
+					page: dict = json.loads(decoded)
+					etag: str = response.headers.get('ETag')
+					last_modified: str = response.headers.get('Last-Modified')
+
+					# Every page is recorded, as the record ranges of the pages after it depend on its size
+					if CACHE:
+						PAGE_VALIDATORS[url] = {
+							'etag': etag,
+							'last_modified': last_modified,
+							'count': page['count'],
+							'next': page['next'],
+							'previous': page['previous'],
+							'records': len(page['results'])
+						}
+
+					return page
+
+				if response.status != 429 and response.status < 500:
+					error("Encountered a problem: %s", response.status)
+					return None
+
+				if response.status == 429:
+					THROTTLED_RESPONSES += 1
+
+				reason: str = f'status {response.status}'
+				retry_after = response.headers.get('Retry-After')
+
+		except (asyncio.TimeoutError, ClientConnectionError, ClientPayloadError, zlib.error, ValueError) as err:
+			# ValueError covers a body that isn't valid JSON or UTF-8, such as one cut short
+			reason: str = f'{type(err).__name__} {err}'.strip()
+
+		if attempt == MAX_RETRIES:
+			break
+
+		RETRIED_REQUESTS += 1
+		delay: float = retry_delay(attempt, retry_after)
+
+		if VERBOSE:
+			print(f'Retrying {url} in {delay:.2f}s after {reason}')
+
+		await asyncio.sleep(delay)
+
+	print(f'Giving up on {url} after {MAX_RETRIES} retries, the last attempt failed with {reason}')
+	return None
+
+async def fetch_pages_sequentially(session: ClientSession, url: str, container) -> bool:
+	""" Fetches the pages of data for a particular category one after another, following the `next` 
+		url of each page until all the pages are collected and appended to the passed container.
+		Returns `True` or `False`, if every page was fetched or not.
+
+		Parameters:
+			session (ClientSession): The app's aiohttp session
+			url (str): The url of the first page of the category
+			container (list | asyncio.Queue): The container to append the new page to
+
+		Returns:
+			Returns `True` or `False`, if every page was fetched or not.
+	"""
+	while url != None:
+		results = await fetch_json(session, url)
+
+		if results is None:
+			return False
+
+		await store_page(container, results['results'])
+
+		url = results['next']
+
+	return True
+
+async def fetch_pages_concurrently(session: ClientSession, url: str, container):
+	""" Fetches the first page of a category, works out the total page count from its `count` 
+		and page size, then fetches the remaining pages concurrently, with at most 
+		`PAGE_CONCURRENCY` requests in flight. The pages are appended to the passed container 
+		in their original order.
+		Returns `True` or `False`, if every page was fetched or not.
+
+		Parameters:
+			session (ClientSession): The app's aiohttp session
+			url (str): The url of the first page of the category
+			container (list | asyncio.Queue): The container to append the pages to
+
+		Returns:
+			Returns `True` or `False`, if every page was fetched or not.
+	"""
+	first_page = await fetch_json(session, url)
+
+	if first_page is None:
+		return False
+
+	await store_page(container, first_page['results'])
+
+	page_size: int = len(first_page['results'])
+	if first_page['next'] == None or page_size == 0:
+		return True
+
+	page_count: int = math.ceil(first_page['count'] / page_size)
+	semaphore = asyncio.Semaphore(PAGE_CONCURRENCY)
+
+	async def fetch_numbered_page(page_number: int):
+		async with semaphore:
+			return await fetch_json(session, f'{url}?page={page_number}')
+
+	tasks: list = [asyncio.ensure_future(fetch_numbered_page(n)) for n in range(2, page_count + 1)]
+
+	try:
+		# Await the pages in the order they were requested, not the order they arrived
+		for task in tasks:
+			page = await task
+
+			if page is None:
+				return False
+
+			await store_page(container, page['results'])
+
+		return True
+
+	finally:
+		for task in tasks:
+			task.cancel()
+
+def print_fetch_counts():
+	""" Prints how many pages were reused from the cache, and how many requests were retried or throttled. """
+	if VERBOSE and len(CACHED_PAGES) > 0:
+		print(f'{NOT_MODIFIED_PAGES} pages were not modified and reused from the cache')
+
+	if RETRIED_REQUESTS > 0 or VERBOSE:
+		print(f'{RETRIED_REQUESTS} requests were retried, {THROTTLED_RESPONSES} responses were throttled')
+
+def cache_directory(filename: str, path: str) -> str:
+	""" Returns the directory the cache is sharded into, one file per category plus a manifest.
+		If the directory does not exist, it will be created.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+
+			Returns:
+				directory (str): The cache directory, path/filename
+	"""
+	directory: str = path + '/' + filename
+
+	if not Path(directory).exists():
+		pathlib.Path(directory).mkdir(parents=True, exist_ok=True)
+
+	return directory
+
+def file_hash(file_path: str) -> str:
+	""" Returns the SHA-256 hash of the file at `file_path`, read in chunks.
+
+			Parameters:
+				file_path (str): The path to the file
+
+			Returns:
+				digest (str): The hex digest of the file's contents
+	"""
+	digest = hashlib.sha256()
+
+	with open(file_path, 'rb') as target_file:
+		for chunk in iter(lambda: target_file.read(1 << 16), b''):
+			digest.update(chunk)
+
+	return digest.hexdigest()
+
+def read_manifest(filename: str, path: str) -> dict:
+	""" Reads the cache manifest, which records when each cached category was fetched, how many records 
+		it holds and the hash of its file.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+
+			Returns:
+				manifest (dict): The manifest entry of each cached category, by category name
+	"""
+	manifest_path: str = cache_directory(filename, path) + '/manifest.json'
+
+	if not Path(manifest_path).exists():
+		return {}
+
+	with open(manifest_path) as target_file:
+		return json.load(target_file)
+
+def write_manifest(filename: str, path: str, manifest: dict):
+	""" Writes the cache manifest, replacing the previous one in a single rename.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+				manifest (dict): The manifest entry of each cached category, by category name
+	"""
+	manifest_path: str = cache_directory(filename, path) + '/manifest.json'
+
+	with open(manifest_path + '.part', 'w') as target_file:
+		json.dump(manifest, target_file, indent=4)
+
+	os.replace(manifest_path + '.part', manifest_path)
+
+def cache_path(filename: str, path: str, category_name: str, cache_format: str = None) -> str:
+	""" Returns the path of the cache file of `category_name`.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+				category_name (str): The name of the category
+				cache_format (str): The format of the cache file (DEFAULT: `CACHE_FORMAT`)
+
+			Returns:
+				category_path (str): The path of the category's cache file
+	"""
+	if cache_format is None:
+		cache_format = CACHE_FORMAT
+
+	extension: str = '.bin' if cache_format == 'binary' else '.json'
+
+	return cache_directory(filename, path) + '/' + category_name + extension
+
+def cache_part_path(filename: str, path: str, category_name: str) -> str:
+	""" Returns the path of the partial cache file that `category_name` is written into, before it 
+		replaces the category's cache file.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+				category_name (str): The name of the category
+
+			Returns:
+				part_path (str): The path of the partial cache file
+	"""
+	return cache_path(filename, path, category_name) + '.part'
+
+class JsonCacheWriter:
+	""" Writes the entries of a category to a partial cache file as a JSON array, a page at a time. """
+
+	def __init__(self, part_path: str):
+		self.target_file = open(part_path, 'w')
+		self.record_count: int = 0
+
+		self.target_file.write('[')
+
+	def append(self, entries: list):
+		for entry in entries:
+			self.target_file.write('\n' if self.record_count == 0 else ',\n')
+			self.target_file.write(json.dumps(entry, indent=4))
+			self.record_count += 1
+
+	def finish(self):
+		self.target_file.write('\n]')
+		self.target_file.close()
+
+	def close(self):
+		self.target_file.close()
+
+class BinaryCacheWriter:
+	""" Writes the entries of a category to a partial cache file in the binary cache format, a page at a time:
+		a header (`BINARY_CACHE_MAGIC`, the version and the flags), each record as compact JSON (zlib 
+		compressed if `COMPRESS_CACHE`), an index of the records' offsets and a footer of the index's 
+		offset and the record count, so `BinaryCacheReader` can find any record without parsing the others.
+	"""
+
+	def __init__(self, part_path: str):
+		self.target_file = open(part_path, 'wb')
+		self.compress: bool = COMPRESS_CACHE
+		self.offsets = array('Q')
+		self.record_count: int = 0
+
+		flags: int = BINARY_CACHE_COMPRESSED if self.compress else 0
+		self.target_file.write(BINARY_CACHE_MAGIC + bytes([BINARY_CACHE_VERSION, flags]))
+
+	def append(self, entries: list):
+		for entry in entries:
+			record: bytes = json.dumps(entry, separators=(',', ':')).encode()
+
+			if self.compress:
+				record = zlib.compress(record)
+
+			self.offsets.append(self.target_file.tell())
+			self.target_file.write(record)
+			self.record_count += 1
+
+	def finish(self):
+		index_offset: int = self.target_file.tell()
+
+		# The index ends with the offset of the index itself, which is where the last record ends
+		self.offsets.append(index_offset)
+		self.target_file.write(struct.pack(f'<{len(self.offsets)}Q', *self.offsets))
+		self.target_file.write(struct.pack('<QQ', index_offset, self.record_count))
+		self.target_file.close()
+
+	def close(self):
+		self.target_file.close()
+
+class BinaryCacheReader:
+	""" Memory-maps a cache file in the binary cache format and decodes its records on access, 
+		so a category can be read record by record without loading the whole file.
+	"""
+
+	def __init__(self, file_path: str):
+		with open(file_path, 'rb') as source_file:
+			self.buffer = mmap.mmap(source_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+		magic_length: int = len(BINARY_CACHE_MAGIC)
+
+		if self.buffer[:magic_length] != BINARY_CACHE_MAGIC or self.buffer[magic_length] != BINARY_CACHE_VERSION:
+			raise ValueError(f'{file_path} is not a version {BINARY_CACHE_VERSION} binary cache file')
+
+		self.compressed: bool = self.buffer[magic_length + 1] & BINARY_CACHE_COMPRESSED != 0
+		self.index_offset, self.record_count = struct.unpack_from('<QQ', self.buffer, len(self.buffer) - 16)
+
+	def __len__(self) -> int:
+		return self.record_count
+
+	def __getitem__(self, index: int) -> dict:
+		if index < 0:
+			index += self.record_count
+
+		if index < 0 or index >= self.record_count:
+			raise IndexError('binary cache record index out of range')
+
+		start, end = struct.unpack_from('<QQ', self.buffer, self.index_offset + index * 8)
+		record: bytes = self.buffer[start:end]
+
+		if self.compressed:
+			record = zlib.decompress(record)
+
+		return json.loads(record)
+
+	def __iter__(self):
+		for index in range(self.record_count):
+			yield self[index]
+
+def open_cache_writer(part_path: str):
+	""" Opens a writer for the partial cache file at `part_path` in the `CACHE_FORMAT` format.
+
+			Parameters:
+				part_path (str): The path of the partial cache file, from `cache_part_path`
+
+			Returns:
+				writer (JsonCacheWriter | BinaryCacheWriter): The writer
+	"""
+	if CACHE_FORMAT == 'binary':
+		return BinaryCacheWriter(part_path)
+
+	return JsonCacheWriter(part_path)
+
+def commit_cache_part(filename: str, path: str, category_name: str, record_count: int, manifest: dict):
+	""" Replaces the cache file of `category_name` with its finished partial cache file, removes its cache 
+		file in any other format, and records it in the passed manifest, along with its hash, size and 
+		modification time. The manifest still has to be written with `write_manifest`.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+				category_name (str): The name of the category
+				record_count (int): The number of records in the cache file
+				manifest (dict): The manifest to record the category in
+	"""
+	category_path: str = cache_path(filename, path, category_name)
+
+	os.replace(category_path + '.part', category_path)
+
+	for cache_format in CACHE_FORMATS:
+		other_path: str = cache_path(filename, path, category_name, cache_format)
+
+		if other_path != category_path and Path(other_path).exists():
+			os.remove(other_path)
+
+	stat = os.stat(category_path)
+
+	manifest[category_name] = {
+		'fetched_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+		'records': record_count,
+		'file': Path(category_path).name,
+		'sha256': file_hash(category_path),
+		'size': stat.st_size,
+		'mtime_ns': stat.st_mtime_ns
+	}
+
+def write_to_file(filename: str, path: str, category_names: list):
+	""" Caches the fetched data of `category_names` at path/filename/category_name.json (or .bin, 
+		depending on `CACHE_FORMAT`), along with their page validators, and records them in the manifest. 
+		The other cached categories are left untouched.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+				category_names (list): The names of the categories to cache
+	"""
+	manifest: dict = read_manifest(filename, path)
+
+	for category_name in category_names:
+		start: float = time.perf_counter()
+		part_path: str = cache_part_path(filename, path, category_name)
+		writer = open_cache_writer(part_path)
+		writer.append(DATA[category_name])
+		writer.finish()
+
+		record_metrics('cache_write', category_name, seconds=time.perf_counter() - start, rows=len(DATA[category_name]), 
+			bytes=os.path.getsize(part_path))
+
+		commit_cache_part(filename, path, category_name, len(DATA[category_name]), manifest)
+		write_validators(filename, path, category_name, manifest)
+
+	write_manifest(filename, path, manifest)
+
+def cache_file_matches(category_path: str, category_manifest: dict, verify: bool = False) -> bool:
+	""" Checks a cache file against its manifest entry. A file with the recorded size and modification time 
+		is trusted as is, otherwise, or if `verify`, the whole file is hashed and compared to the recorded hash.
+
+			Parameters:
+				category_path (str): The path to the cache file
+				category_manifest (dict): The manifest entry of the cache file's category
+				verify (bool): Whether to hash the file even if its size and modification time match
+
+			Returns:
+				Returns `True` or `False`, if the file matches its manifest entry or not.
+	"""
+	stat = os.stat(category_path)
+
+	if (not verify and stat.st_size == category_manifest.get('size') 
+		and stat.st_mtime_ns == category_manifest.get('mtime_ns')):
+		return True
+
+	return file_hash(category_path) == category_manifest['sha256']
+
+def read_from_file(filename: str, path: str, category_name: str, manifest: dict, verify: bool = False) -> bool:
+	""" Reads the cached data of `category_name` into DATA, if the category is in the manifest and its file 
+		still matches it, see `cache_file_matches`. The format of the file is detected from its first bytes: a JSON file is parsed whole, while a binary 
+		one is memory-mapped and decoded record by record as it's used.
+		Returns `True` or `False`, if the category was read from the cache or not.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+				category_name (str): The name of the category to read
+				manifest (dict): The manifest, from `read_manifest`
+				verify (bool): Whether to hash the file even if its size and modification time match
+
+			Returns:
+				Returns `True` or `False`, if the category was read from the cache or not.
+	"""
+	if not category_name in manifest:
+		return False
+
+	start: float = time.perf_counter()
+	category_path: str = cache_directory(filename, path) + '/' + manifest[category_name].get('file', category_name + '.json')
+
+	if not Path(category_path).exists():
+		return False
+
+	if not cache_file_matches(category_path, manifest[category_name], verify):
+		print(f'The cached {category_name} do not match the manifest, refetching..')
+		return False
+
+	DATA[category_name] = open_cached_records(category_path)
+
+	record_metrics('cache_read', category_name, seconds=time.perf_counter() - start, rows=len(DATA[category_name]), 
+		bytes=os.path.getsize(category_path))
+
+	return True
+
+def read_from_path(path: str):
+	""" Reads the cached data at path. A `.ndjson` or `.jsonl` file is not read up front, see `NdjsonRecords`: 
+		the categories in `CATEGORY_NAMES` are registered, along with the categories they reference, so the 
+		references can still be resolved.
+
+			Parameters:
+				path (str): The path to the exported file (DEFAULT: `./bin/swapi_data.json`)
+	"""
+	global DATA
+
+	if path.lower().endswith(NDJSON_EXTENSIONS):
+		category_names: set = set(CATEGORY_NAMES)
+
+		for category_name in CATEGORY_NAMES:
+			category_names |= referenced_categories(category_name)
+
+		for category_name in category_names:
+			DATA[category_name] = NdjsonRecords(path, category_name)
+
+		return
+
+	with open(path) as target_file:
+		DATA = json.load(target_file)
+
+class NdjsonRecords:
+	""" The records of one category in a newline-delimited JSON dataset, where every line is a record 
+		tagged with its category: `{"category": "people", "record": {...}}`. The file is read a line at a 
+		time each time the records are iterated, so memory use doesn't grow with the size of the file.
+	"""
+
+	def __init__(self, path: str, category_name: str):
+		self.path: str = path
+		self.category_name: str = category_name
+		self.record_count: int = None
+		# The category's name is also a field and part of the urls of most records, so only its tag is matched
+		self.tag_pattern = re.compile(r'"category"\s*:\s*"' + re.escape(category_name) + '"')
+
+	def __iter__(self):
+		with open(self.path) as source_file:
+			for line in source_file:
+				# The lines of other categories are skipped without being parsed
+				if self.tag_pattern.search(line) is None:
+					continue
+
+				tagged_record: dict = json.loads(line)
+
+				if tagged_record['category'] == self.category_name:
+					yield tagged_record['record']
+
+	def __len__(self) -> int:
+		if self.record_count is None:
+			self.record_count = sum(1 for _ in self)
+
+		return self.record_count
+
+class CompactRecord:
+	""" The base of the compact records of `compact_category`: a `__slots__` object per record, holding only 
+		the fields the tables are built from. Fields are read like those of a dict, `record['name']`, and a field 
+		the source record didn't have raises a `KeyError`, as it would have.
+	"""
+	__slots__ = ()
+	category_name: str = ''
+
+	def __getitem__(self, field: str):
+		try:
+			return getattr(self, field)
+
+		except AttributeError:
+			raise KeyError(field) from None
+
+	def __contains__(self, field: str) -> bool:
+		return hasattr(self, field)
+
+	def get(self, field: str, default = None):
+		return getattr(self, field, default)
+
+	def __reduce__(self):
+		# The record classes are made at run time, so a worker process looks its own up by category name
+		return (empty_record, (self.category_name,), {field: getattr(self, field) for field in self.__slots__ if hasattr(self, field)})
+
+	def __setstate__(self, state: dict):
+		for field, value in state.items():
+			setattr(self, field, value)
+
+def record_fields(category_name) -> list:
+	""" Returns the fields of the entries of `category_name` the tables are built from: the `url`, the columns 
+		that aren't generated and the relationship fields of the junction tables.
+
+			Parameters:
+				category_name (str): The name of the category
+
+			Returns:
+				fields (list): The field names
+	"""
+	schema: dict = SCHEMA[category_name]
+	fields: list = ['url']
+	fields += [column['column_name'] for column in schema['columns'] if not (schema['generated_key'] and column['column_name'] in schema['key'])]
+	fields += [relationship['field'] for relationship in schema['relationships']]
+
+	return list(dict.fromkeys(fields))
+
+@lru_cache(maxsize=None)
+def record_class(category_name) -> type:
+	""" Makes the `CompactRecord` class of `category_name`, with a slot per field of `record_fields`. """
+	return type(category_name + '_record', (CompactRecord,), {'__slots__': tuple(record_fields(category_name)), 'category_name': category_name})
+
+def empty_record(category_name) -> CompactRecord:
+	""" Makes a compact record of `category_name` without any fields, for unpickling. """
+	return record_class(category_name).__new__(record_class(category_name))
+
+def compact_value(value):
+	""" Interns a string, or the strings of a list, which is made a tuple, so values that repeat across records, 
+		such as `unknown` or the url of a film, are only held once. """
+	if type(value) is str:
+		return sys.intern(value)
+
+	if type(value) is list:
+		return tuple([sys.intern(element) if type(element) is str else element for element in value])
+
+	return value
+
+def compact_category(category_name):
+	""" Replaces the entries of `category_name` in DATA by compact records, see `CompactRecord`, dropping the 
+		fields that aren't loaded, such as `created` and `edited`. Lazily read categories, from an NDJSON 
+		dataset or a binary cache, are left as they are.
+
+			Parameters:
+				category_name (str): The name of the category
+	"""
+	entries = DATA.get(category_name)
+
+	if type(entries) is not list:
+		return
+
+	record_type: type = record_class(category_name)
+	fields: tuple = record_type.__slots__
+
+	for index, entry in enumerate(entries):
+		record: CompactRecord = record_type()
+
+		for field in fields:
+			if field in entry:
+				setattr(record, field, compact_value(entry[field]))
+
+		# Replaced in place, so the dict can be freed straight away
+		entries[index] = record
+
+def page_number(url: str) -> int:
+	""" Returns the number of the page at `url`, such as `2` for `https://swapi.dev/api/people/?page=2`. """
+	if not 'page=' in url:
+		return 1
+
+	return int(url.rsplit('page=', 1)[1].split('&', 1)[0])
+
+def write_validators(filename: str, path: str, category_name: str, manifest: dict):
+	""" Caches the validators (ETag, Last-Modified) of the pages of `category_name` fetched this run at 
+		path/filename/category_name.validators.json, so the next refresh of the category can revalidate 
+		instead of refetching. The pages' contents aren't cached again: each page records the range of 
+		records it holds in the category's cache file, along with its `count`, `next` and `previous`, and 
+		the hash of the cache file the ranges are into.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+				category_name (str): The name of the category
+				manifest (dict): The manifest, with the category's freshly committed cache file
+	"""
+	category_url: str = SWAPI_API_URL + category_name + '/'
+	urls: list = sorted([url for url in PAGE_VALIDATORS if url.startswith(category_url)], key=page_number)
+	pages: dict = {}
+	start: int = 0
+
+	for url in urls:
+		page: dict = PAGE_VALIDATORS[url]
+		end: int = start + page['records']
+
+		if page['etag'] is not None or page['last_modified'] is not None:
+			pages[url] = {
+				'etag': page['etag'],
+				'last_modified': page['last_modified'],
+				'count': page['count'],
+				'next': page['next'],
+				'previous': page['previous'],
+				'start': start,
+				'end': end
+			}
+
+		start = end
+
+	with open(cache_directory(filename, path) + '/' + category_name + '.validators.json', 'w') as target_file:
+		json.dump({'sha256': manifest[category_name]['sha256'], 'pages': pages}, target_file)
+
+def read_validators(filename: str, path: str, category_name: str):
+	""" Reads the cached page validators of `category_name`, if there are any and the cache file their 
+		record ranges are into is still the one in the manifest, and still matches it.
+
+			Parameters:
+				filename (str): The root name of the exported files (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported files (DEFAULT: `./bin/`)
+				category_name (str): The name of the category
+	"""
+	validators_path: str = cache_directory(filename, path) + '/' + category_name + '.validators.json'
+	category_manifest: dict = read_manifest(filename, path).get(category_name)
+
+	if not Path(validators_path).exists() or category_manifest is None:
+		return
+
+	with open(validators_path) as target_file:
+		validators: dict = json.load(target_file)
+
+	category_path: str = cache_directory(filename, path) + '/' + category_manifest['file']
+
+	# Validators of an older version, or of a cache file that has since been replaced, can't rebuild their pages
+	if (validators.get('sha256') != category_manifest['sha256'] or not Path(category_path).exists() 
+		or not cache_file_matches(category_path, category_manifest)):
+		return
+
+	CACHED_SHARD_PATHS[category_name] = category_path
+	CACHED_PAGES.update(validators['pages'])
+
+def open_cached_records(category_path: str):
+	""" Opens a cache file in either format: a binary one is memory-mapped, see `BinaryCacheReader`, and a 
+		JSON one is parsed whole.
+
+			Parameters:
+				category_path (str): The path to the cache file
+
+			Returns:
+				records (list | BinaryCacheReader): The records of the cache file
+	"""
+	with open(category_path, 'rb') as target_file:
+		if target_file.read(len(BINARY_CACHE_MAGIC)) == BINARY_CACHE_MAGIC:
+			return BinaryCacheReader(category_path)
+
+		target_file.seek(0)
+
+		return json.load(target_file)
+
+def cached_page_contents(url: str, cached_page: dict) -> dict:
+	""" Rebuilds a page that wasn't modified from the records of its range in the category's cache file, 
+		which is opened the first time one of its pages is needed.
+
+			Parameters:
+				url (str): The url of the page
+				cached_page (dict): The page's validators, from `read_validators`
+
+			Returns:
+				page (dict): The page, with its `count`, `next`, `previous` and `results`
+	"""
+	category_name: str = url_category(url)
+
+	if not category_name in CACHED_SHARDS:
+		CACHED_SHARDS[category_name] = open_cached_records(CACHED_SHARD_PATHS[category_name])
+
+	records = CACHED_SHARDS[category_name]
+
+	return {
+		'count': cached_page['count'],
+		'next': cached_page['next'],
+		'previous': cached_page['previous'],
+		'results': [records[index] for index in range(cached_page['start'], cached_page['end'])]
+	}
+
+def build_columns(category_name) -> str:
+	""" Builds the table column insert headers, insert value pattern, and CREATE TABLE column declarations
+		for the table for `category_name`.
+		Returns the CREATE TABLE column declarations.
+
+			Parameters:
+				category_name (str): The name of the category to build to columns for
+
+			Returns:
+				column_decl (str): The column declarations for a CREATE TABLE statement
+	"""
+	global SCHEMA
+
+	generated_key: bool = SCHEMA[category_name]['generated_key']
+	key: list = SCHEMA[category_name]['key']
+	has_primary_key: bool = True if len(key) > 0 else False
+	column_types: list = SCHEMA[category_name]['columns']
+	column_decl: str = ''
+	column_header: str = ''
+	column_format: str = ''
+	value: str = '%s'
+	type_count: int = len(column_types)
+
+	for index, col in enumerate(column_types):
+		name: str = col['column_name']
+		column_type: str = col['column_type']
+		column_decl += ' ' + name + ' ' + column_type
+		
+		not_end: bool = index + 1 < type_count
+
+		if not_end or has_primary_key:
+			column_decl += ','
+
+
+		# With junction tables, the generated key holds the resource id from the url, see `compile_row_transformer`
+		if not generated_key or JUNCTIONS or not name in key:
+			column_header += name
+
+			if column_type.startswith('DATE'):
+				column_format += f'CAST({value} AS DATE)'
+			elif column_type.startswith('SMALLINT'):
+				column_format += f'CAST({value} AS SMALLINT)'
+			else:
+				column_format += value
+
+			if not_end:
+				column_header += ', '
+				column_format += ', '
+
+	SCHEMA[category_name]['header'] = column_header
+	SCHEMA[category_name]['value_format'] = column_format
+
+	return column_decl
+
+def build_create_table_query(category_name, table_name: str = None, if_not_exists: bool = False, fast_load: bool = False) -> str:
+	""" Builds the CREATE TABLE statement for the table of `category_name`, with the column declarations 
+		from `build_columns` and its primary key.
+
+			Parameters:
+				category_name (str): The name of the category
+				table_name (str): The name of the table (DEFAULT: `category_name`)
+				if_not_exists (bool): Whether to leave an existing table as it is (DEFAULT: `False`)
+				fast_load (bool): Whether to make the table UNLOGGED and leave its primary key to `finish_fast_load` (DEFAULT: `False`)
+
+			Returns:
+				create_table_query (str): The CREATE TABLE statement
+	"""
+	if table_name is None:
+		table_name = category_name
+
+	column_decls: str = build_columns(category_name)
+	comp_key: str = 'PRIMARY KEY ('
+
+	key: list = SCHEMA[category_name]['key']
+	sub_key_count: int = len(key)
+
+	if sub_key_count > 1:
+		for index, key_part in enumerate(key):
+			comp_key += key_part
+
+			if index + 1 < sub_key_count:
+				comp_key += ', '
+		comp_key += ')'
+	elif sub_key_count == 1:
+		comp_key += key[0]
+		comp_key += ')'
+	elif sub_key_count == 0:
+		comp_key = ''
+
+	if fast_load:
+		column_decls = column_decls.rstrip(',')
+		comp_key = ''
+
+	return f'''CREATE {'UNLOGGED ' if fast_load else ''}TABLE {'IF NOT EXISTS ' if if_not_exists else ''}{table_name} (
+		{column_decls}
+		{comp_key}
+	);'''
+
+def create_table(cursor, table_name, fast_load: bool = False) -> bool:
+	""" Creates the table with the specified `table_name` and column declarations from `build_columns`. 
+		Returns `True` or `False`, if the table creation was successful or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				table_name (str): The name of the table, typically the same as the category name
+				fast_load (bool): Whether to create the table UNLOGGED and without its primary key (DEFAULT: `False`)
+
+			Returns:
+				`True` or `False, if the table creation was successful or not
+	"""
+	try:
+		# Delete a previous iteration of the table, if exists
+		drop_table_query: str = f'''
+		DROP TABLE IF EXISTS {table_name};
+		'''
+		cursor.execute(drop_table_query)
+
+		create_table_query: str = build_create_table_query(table_name, fast_load=fast_load)
+
+		# print(create_table_query)
+
+		cursor.execute(create_table_query)
+
+		return True
+
+	except Exception as err:
+		print('An exception occurred while creating the table: ', err)
+		return False
+
+def find_entity(url: str, category_name: str) -> dict:
+	""" Looks the entity at `url` up in `ENTITY_INDEX`.
+		Raises a `KeyError` if the entity hasn't been fetched.
+
+			Parameters:
+				url (str): The resource url of the entity
+				category_name (str): The name of the category of the entity
+
+			Returns:
+				entity (dict): The entity
+	"""
+	entity: dict = ENTITY_INDEX.get(url)
+
+	if entity is None:
+		raise KeyError(f'{url} is not in the fetched {category_name}')
+
+	return entity
+
+def resource_id(url: str) -> int:
+	""" Reads the id at the end of a resource url, such as `12` for `https://swapi.dev/api/planets/12/`.
+
+			Parameters:
+				url (str): The resource url
+
+			Returns:
+				id (int): The resource id
+	"""
+	return int(url.rstrip('/').rsplit('/', 1)[1])
+
+def compile_reference(column: dict):
+	""" Compiles a reference column, such as `homeworld` or `films`, into a converter that resolves each 
+		resource url through `ENTITY_INDEX` to the `reference_field` of the entity. Array columns resolve 
+		every url in the list, into a list such as `['A New Hope', 'The Empire Strikes Back']`.
+
+			Parameters:
+				column (dict): The column in `SCHEMA`
+
+			Returns:
+				converter (function): The converter of the column values
+	"""
+	field: str = column['reference_field']
+	category_name: str = column['references']
+
+	def resolve(url):
+		if url is None:
+			return None
+
+		return find_entity(url, category_name)[field]
+
+	if column['column_type'].endswith('[]'):
+		def resolve_all(urls: list) -> list:
+			return [resolve(url) for url in urls]
+
+		return resolve_all
+
+	return resolve
+
+def convert_column(convert):
+	""" Turns a converter of single values, such as a reference converter, into one of whole columns. """
+	def convert_values(values: list) -> list:
+		return [convert(value) for value in values]
+
+	return convert_values
+
+def split_array(entry_data: str) -> list:
+	""" Splits a comma separated field, such as `blue, grey`, into its elements, such as `['blue', 'grey']`.
+
+			Parameters:
+				entry_data (str): The comma separated field
+
+			Returns:
+				elements (list): The elements of the field, without the spaces after each comma
+	"""
+	elements: list = entry_data.split(',')
+
+	# A lone element used to be written unquoted, which PostgreSQL trims
+	if len(elements) == 1:
+		return [entry_data.strip()]
+
+	return [elements[0]] + [element.lstrip(' ') for element in elements[1:]]
+
+@lru_cache(maxsize=ARRAY_CACHE_SIZE)
+def parse_array(entry_data: str) -> list:
+	""" Splits a comma separated field into a list, see `split_array`, that the driver adapts into a PostgreSQL 
+		array. The same fields repeat across thousands of entries, so the lists of the last `ARRAY_CACHE_SIZE` 
+		distinct fields are memoised. Every row with the same field shares its list, which must not be modified.
+
+			Parameters:
+				entry_data (str): The comma separated field
+
+			Returns:
+				elements (list): The elements of the field
+	"""
+	return split_array(entry_data)
+
+@lru_cache(maxsize=ARRAY_CACHE_SIZE)
+def array_literal(entry_data: str) -> str:
+	""" Writes a comma separated field as the text of a PostgreSQL array literal, for the `array_parse` columns 
+		that aren't arrays, such as `{ "Gary Kurtz", "Rick McCallum" }` for the `producer` of a film. 
+		Memoised like `parse_array`.
+
+			Parameters:
+				entry_data (str): The comma separated field
+
+			Returns:
+				arr_data (str): The array literal
+	"""
+	elements: list = split_array(entry_data)
+
+	if len(elements) == 1:
+		return '{ ' + entry_data + ' }'
+
+	return '{ ' + ', '.join(['"' + element + '"' for element in elements]) + ' }'
+
+def array_cache_counts() -> tuple:
+	""" Returns how many `array_parse` fields were read from the memo caches, and how many were parsed. """
+	hits: int = 0
+	misses: int = 0
+
+	for cache_info in [parse_array.cache_info(), array_literal.cache_info()]:
+		hits += cache_info.hits
+		misses += cache_info.misses
+
+	return hits, misses
+
+def compile_row_transformer(category_name) -> list:
+	""" Compiles `SCHEMA[category_name]['columns']` into a fixed list of `(column_name, converter)` pairs, 
+		so that the per-column decisions (generated keys, the consistency formatting, the reference 
+		look ups and array parsing) are made once per category instead of once per cell. Each converter 
+		converts a whole column of values, see `column_batches`, mapping the `FORMAT` placeholders to 
+		NULL with one set membership pass over the column. The natural key columns are left out of the 
+		`FORMAT` placeholders, as a name such as `unknown` (a planet's) identifies its row.
+
+			Parameters:
+				category_name (str): The name of the category to compile the transformer for
+
+			Returns:
+				converters (list): The `(field, converter)` pairs, in the column order of the table, where 
+					`field` is the field of the entry the column is converted from
+	"""
+	schema:dict = SCHEMA[category_name]
+	has_generated_key: bool = schema['generated_key']
+	key: list = schema['key']
+
+	# Formatting: the values that are stored as NULL
+	null_values: frozenset = frozenset(['NULL', 'unknown', 'none', 'n/a', 'N/A']) if FORMAT else frozenset(['NULL'])
+	key_null_values: frozenset = frozenset(['NULL'])
+
+	def convert_values(values: list) -> list:
+		return [None if type(value) is str and value in null_values else value for value in values]
+
+	def convert_keys(values: list) -> list:
+		return [None if type(value) is str and value in key_null_values else value for value in values]
+
+	def convert_arrays(values: list) -> list:
+		return [None if type(value) is str and value in null_values else parse_array(value) for value in values]
+
+	def convert_array_literals(values: list) -> list:
+		return [None if type(value) is str and value in null_values else array_literal(value) for value in values]
+
+	converters: list = []
+
+	for column in schema['columns']:
+		column_name: str = column['column_name']
+
+		if has_generated_key and column_name in key:
+			if JUNCTIONS:
+				converters.append(('url', convert_column(resource_id)))
+
+			continue
+
+		if 'references' in column:
+			converters.append((column_name, convert_column(compile_reference(column))))
+		elif column_name in schema['natural_key']:
+			converters.append((column_name, convert_keys))
+		elif column['array_parse'] and column['column_type'].endswith('[]'):
+			converters.append((column_name, convert_arrays))
+		elif column['array_parse']:
+			converters.append((column_name, convert_array_literals))
+		else:
+			converters.append((column_name, convert_values))
+
+	return converters
+
+def build_rows(category_name, entries: list = None) -> Iterator[tuple]:
+	""" Transforms the fetched or cached entries of `category_name` into the rows of its table, one tuple
+		of column values per entry, in the column order of `SCHEMA[category_name]['header']`. The entries are 
+		split into columns and converted a column at a time, then zipped back into rows for the loaders.
+
+			Parameters:
+				category_name (str): The name of the category to transform
+				entries (list): The entries to transform (DEFAULT: `DATA[category_name]`)
+
+			Returns:
+				rows (Iterator[tuple]): The table rows, yielded one at a time
+	"""
+	converters: list = compile_row_transformer(category_name)
+
+	if entries is None:
+		entries = DATA[category_name]
+
+	for columns in column_batches(entries, [field for field, _ in converters]):
+		yield from zip(*[convert(values) for (_, convert), values in zip(converters, columns)])
+
+def column_batches(entries, fields: list) -> Iterator[list]:
+	""" Converts entries into columns, in batches of `TRANSFORM_CHUNK_SIZE` entries, so that a lazily read 
+		dataset isn't held in memory all at once.
+
+			Parameters:
+				entries (list): The entries to convert
+				fields (list): The fields of the entries to make columns of
+
+			Returns:
+				batches (Iterator[list]): For each batch, a list of the values of each field, in the order of `fields`
+	"""
+	source = iter(entries)
+	batch: list = list(islice(source, TRANSFORM_CHUNK_SIZE))
+
+	while len(batch) > 0:
+		yield [list(map(itemgetter(field), batch)) for field in fields]
+
+		batch = list(islice(source, TRANSFORM_CHUNK_SIZE))
+
+def init_transform_worker(schema: dict, entity_index: dict, format_values: bool, junctions: bool):
+	""" Sets up a transform worker process with the state `build_rows` reads, as a worker started by the 
+		forkserver, or spawned, starts from the defaults of the module.
+
+			Parameters:
+				schema (dict): `SCHEMA`
+				entity_index (dict): The part of `ENTITY_INDEX` the reference columns resolve through
+				format_values (bool): `FORMAT`
+				junctions (bool): `JUNCTIONS`
+	"""
+	global FORMAT, JUNCTIONS
+
+	SCHEMA.update(schema)
+	ENTITY_INDEX.update(entity_index)
+	FORMAT = format_values
+	JUNCTIONS = junctions
+
+def transform_chunk(category_name, entries: list) -> list:
+	""" Transforms a chunk of the entries of `category_name` into rows, in a transform worker process. """
+	return list(build_rows(category_name, entries))
+
+def worker_entity_index() -> dict:
+	""" Returns the part of `ENTITY_INDEX` the reference columns of every category resolve through, each 
+		entity trimmed down to the referenced fields, so as little as possible is sent to the workers.
+
+			Returns:
+				entity_index (dict): The trimmed entities, by resource url
+	"""
+	fields: set = {column['reference_field'] for schema in SCHEMA.values() for column in schema.get('columns', []) if 'references' in column}
+
+	if len(fields) == 0:
+		return {}
+
+	return {url: {field: entity[field] for field in fields if field in entity} for url, entity in ENTITY_INDEX.items()}
+
+def transform_executor() -> ProcessPoolExecutor:
+	""" Returns the pool of `TRANSFORM_WORKERS` worker processes shared by every table of the run, starting 
+		it the first time a table needs it, once `ENTITY_INDEX` holds every loaded category. The workers are 
+		started by a forkserver (spawned where there is none) rather than forked, as forking a process that 
+		runs the database threads could copy a lock another thread holds. The tables load on several threads, 
+		hence the lock.
+
+			Returns:
+				executor (ProcessPoolExecutor): The pool
+	"""
+	global TRANSFORM_EXECUTOR
+
+	with TRANSFORM_EXECUTOR_LOCK:
+		if TRANSFORM_EXECUTOR is None:
+			start_method: str = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+			TRANSFORM_EXECUTOR = ProcessPoolExecutor(TRANSFORM_WORKERS, mp_context=multiprocessing.get_context(start_method), 
+				initializer=init_transform_worker, initargs=(SCHEMA, worker_entity_index(), FORMAT, JUNCTIONS))
+
+		return TRANSFORM_EXECUTOR
+
+def close_transform_executor():
+	""" Shuts the pool of `transform_executor` down, if it was started. """
+	global TRANSFORM_EXECUTOR
+
+	with TRANSFORM_EXECUTOR_LOCK:
+		if TRANSFORM_EXECUTOR is not None:
+			TRANSFORM_EXECUTOR.shutdown(cancel_futures=True)
+			TRANSFORM_EXECUTOR = None
+
+def transform_rows(category_name, entries: list = None) -> Iterator[tuple]:
+	""" Transforms the entries of `category_name` into the rows of its table, like `build_rows`. With 
+		`TRANSFORM_WORKERS`, the entries are split into chunks of `TRANSFORM_CHUNK_SIZE` that are transformed 
+		across the worker processes of `transform_executor`, while the rows of finished chunks are yielded to 
+		the loader in their original order. At most two chunks per worker are in flight at once for each 
+		table, so memory stays bounded. Categories that fit in one chunk are transformed in this process.
+
+			Parameters:
+				category_name (str): The name of the category to transform
+				entries (list): The entries to transform (DEFAULT: `DATA[category_name]`)
+
+			Returns:
+				rows (Iterator[tuple]): The table rows, yielded one at a time
+	"""
+	if entries is None:
+		entries = DATA[category_name]
+
+	if TRANSFORM_WORKERS == 0:
+		yield from build_rows(category_name, entries)
+		return
+
+	source = iter(entries)
+	chunk: list = list(islice(source, TRANSFORM_CHUNK_SIZE))
+
+	if len(chunk) < TRANSFORM_CHUNK_SIZE:
+		yield from build_rows(category_name, chunk)
+		return
+
+	executor: ProcessPoolExecutor = transform_executor()
+	pending: deque = deque()
+
+	try:
+		while len(chunk) > 0:
+			pending.append(executor.submit(transform_chunk, category_name, chunk))
+
+			if len(pending) >= TRANSFORM_WORKERS * 2:
+				yield from pending.popleft().result()
+
+			chunk = list(islice(source, TRANSFORM_CHUNK_SIZE))
+
+		while len(pending) > 0:
+			yield from pending.popleft().result()
+
+	finally:
+		# A refused COPY stops taking rows halfway, so the chunks it won't take aren't left running
+		for future in pending:
+			future.cancel()
+
+def copy_array(elements: list) -> str:
+	""" Writes a list as a PostgreSQL array literal, such as `{"blue","grey"}`, with every element quoted.
+
+			Parameters:
+				elements (list): The elements of the array
+
+			Returns:
+				literal (str): The array literal
+	"""
+	quoted: list = ['NULL' if element is None else '"' + str(element).replace('\\', '\\\\').replace('"', '\\"') + '"' for element in elements]
+
+	return '{' + ','.join(quoted) + '}'
+
+def copy_escape(value) -> str:
+	""" Escapes a column value for PostgreSQL's COPY text format. Lists are written as array literals 
+		first, see `copy_array`.
+
+			Parameters:
+				value: The column value
+
+			Returns:
+				field (str): The escaped field, or `\\N` for NULL
+	"""
+	if value is None:
+		return '\\N'
+
+	if type(value) is list:
+		value = copy_array(value)
+
+	return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+
+class CopyStream:
+	""" A read-only file-like object that streams rows to `cursor.copy_expert` in the COPY text format,
+		encoding them only as PostgreSQL asks for more data instead of building the whole table in memory.
+	"""
+
+	def __init__(self, rows: Iterator[tuple]):
+		self.rows: Iterator[tuple] = rows
+		self.buffer: str = ''
+
+	def read(self, size: int = -1) -> str:
+		while size < 0 or len(self.buffer) < size:
+			row = next(self.rows, None)
+
+			if row is None:
+				break
+
+			self.buffer += '\t'.join(copy_escape(value) for value in row) + '\n'
+
+		if size < 0:
+			size = len(self.buffer)
+
+		chunk: str = self.buffer[:size]
+		self.buffer = self.buffer[size:]
+
+		return chunk
+
+	def readline(self, size: int = -1) -> str:
+		return self.read(size)
+
+def insert_rows(cursor, category_name, rows: Iterator[tuple], table_name: str = None) -> int:
+	""" Inserts `rows` into the table of `category_name` one INSERT statement at a time.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category of the rows
+				rows (Iterator[tuple]): The rows from `build_rows`
+				table_name (str): The name of the table to load the rows into (DEFAULT: `category_name`)
+
+			Returns:
+				statement_count (int): The number of statements issued
+	"""
+	if table_name is None:
+		table_name = category_name
+
+	schema:dict = SCHEMA[category_name]
+	insert_row_query: str = f'''INSERT INTO {table_name} ({schema['header']}) VALUES ({schema['value_format']});'''
+
+	statement_count: int = 0
+
+	for data in rows:
+		# print(insert_row_query % (data[0], data[1], data[2], data[3], data[4], data[5], data[6], data[7], data[8], data[9]))
+		cursor.execute(insert_row_query, data)
+		statement_count += 1
+
+	return statement_count
+
+def batch_insert_rows(cursor, category_name, rows: Iterator[tuple], table_name: str = None) -> int:
+	""" Inserts `rows` into the table of `category_name` with multi-row INSERT statements of up to `BATCH_SIZE` 
+		rows each, for servers (or poolers) that don't allow COPY. Each row is expanded with 
+		`SCHEMA[category_name]['value_format']`, so the CAST columns are kept.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category of the rows
+				rows (Iterator[tuple]): The rows from `build_rows`
+				table_name (str): The name of the table to load the rows into (DEFAULT: `category_name`)
+
+			Returns:
+				statement_count (int): The number of statements issued
+	"""
+	if table_name is None:
+		table_name = category_name
+
+	schema:dict = SCHEMA[category_name]
+	insert_query: str = f'''INSERT INTO {table_name} ({schema['header']}) VALUES %s;'''
+	row_template: str = f'''({schema['value_format']})'''
+	statement_count: int = 0
+	batch: list = []
+
+	for data in rows:
+		batch.append(data)
+
+		if len(batch) == BATCH_SIZE:
+			execute_values(cursor, insert_query, batch, template=row_template, page_size=BATCH_SIZE)
+			statement_count += 1
+			batch = []
+
+	if len(batch) > 0:
+		execute_values(cursor, insert_query, batch, template=row_template, page_size=BATCH_SIZE)
+		statement_count += 1
+
+	return statement_count
+
+def copy_rows(cursor, category_name, rows: Iterator[tuple], table_name: str = None) -> int:
+	""" Streams `rows` into the table of `category_name` with a single COPY FROM STDIN. The CAST()s of 
+		`SCHEMA[category_name]['value_format']` aren't needed, as COPY hands each field straight to the 
+		input function of its column's type.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category of the rows
+				rows (Iterator[tuple]): The rows from `build_rows`
+				table_name (str): The name of the table to load the rows into (DEFAULT: `category_name`)
+
+			Returns:
+				statement_count (int): The number of statements issued
+	"""
+	if table_name is None:
+		table_name = category_name
+
+	copy_query: str = f'''COPY {table_name} ({SCHEMA[category_name]['header']}) FROM STDIN;'''
+
+	cursor.copy_expert(copy_query, CopyStream(rows))
+
+	return 1
+
+def populate_table(cursor, category_name, entries: list = None, table_name: str = None) -> bool:
+	""" Populates the table with the name that matches `category_name` with the fetched or cached data.
+		Uses COPY by default, multi-row INSERTs if `LOAD_METHOD` is `batch`, and per-row INSERTs if 
+		`LOAD_METHOD` is `insert` or the COPY is refused by the server (the feature isn't supported or the 
+		user isn't allowed to use it). Any other COPY error, such as a bad value, fails the table.
+		The time spent building the rows, and how many the table was loaded with, are recorded as the 
+		`transform` metrics of the category, apart from the time spent in the database.
+		Returns `True` or `False`, if the table population was successful or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the table to populate
+				entries (list): The entries to populate the table with (DEFAULT: `DATA[category_name]`)
+				table_name (str): The name of the table to populate, when it isn't `category_name`
+
+			Returns:
+				Returns `True` or `False`, if the table population was successful or not.
+	"""
+	statement_count: int = 0
+	transform: dict = {'seconds': 0.0, 'rows': 0}
+
+	def timed_rows(rows: Iterator[tuple]) -> Iterator[tuple]:
+		# The rows are built a chunk at a time, so timing them costs two clock reads per chunk, not per row
+		while True:
+			start: float = time.perf_counter()
+			chunk: list = list(islice(rows, TRANSFORM_CHUNK_SIZE))
+			transform['seconds'] += time.perf_counter() - start
+
+			if len(chunk) == 0:
+				return
+
+			transform['rows'] += len(chunk)
+			yield from chunk
+
+	def make_rows() -> Iterator[tuple]:
+		# A COPY refused halfway is loaded again from the start, so only the rows of the last attempt count
+		transform['rows'] = 0
+
+		return timed_rows(transform_rows(category_name, entries))
+
+	try:
+		if PROFILE_DIRECTORY != '':
+			# The rows are built up front, so the transform and the database are profiled apart
+			with profile_phase('transform'):
+				rows: list = list(make_rows())
+
+			make_rows = lambda: iter(rows)
+
+		with profile_phase('db'):
+			if LOAD_METHOD == 'copy':
+				# A savepoint lets a refused COPY be undone without losing the freshly created table
+				cursor.execute('SAVEPOINT copy_rows;')
+
+				try:
+					statement_count = copy_rows(cursor, category_name, make_rows(), table_name)
+					cursor.execute('RELEASE SAVEPOINT copy_rows;')
+
+				# Only a server that refuses COPY is worth retrying with INSERTs, a bad row would fail them too
+				except (psycopg2.errors.FeatureNotSupported, psycopg2.errors.InsufficientPrivilege) as err:
+					cursor.execute('ROLLBACK TO SAVEPOINT copy_rows;')
+					print('COPY was refused, falling back to INSERT: ', err)
+					statement_count = insert_rows(cursor, category_name, make_rows(), table_name)
+
+				except psycopg2.Error as err:
+					print('An exception occurred while copying the rows into the table: ', err)
+					return False
+
+			elif LOAD_METHOD == 'batch':
+				statement_count = batch_insert_rows(cursor, category_name, make_rows(), table_name)
+
+			else:
+				statement_count = insert_rows(cursor, category_name, make_rows(), table_name)
+
+		record_metrics('transform', category_name, **transform)
+
+		if VERBOSE:
+			print(f'{statement_count} statements issued for {category_name}')
+
+		return True
+
+	except Exception as err:
+		print('An exception occurred while inserting a row into the table: ', err)
+		return False
+
+def load_table_name(category_name) -> str:
+	""" Returns the name of the table the rows of `category_name` are loaded into: the category's own table, 
+		or its staging table when syncing.
+
+			Parameters:
+				category_name (str): The name of the category
+
+			Returns:
+				table_name (str): The name of the table to load the rows into
+	"""
+	if TABLE_MODE == 'sync':
+		return 'sync_' + category_name
+
+	return category_name
+
+def begin_table(cursor, category_name) -> bool:
+	""" Gets the table of `category_name` ready to be loaded, according to `TABLE_MODE`.
+		Returns `True` or `False`, if the table is ready or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category
+
+			Returns:
+				Returns `True` or `False`, if the table is ready or not.
+	"""
+	start: float = time.perf_counter()
+
+	if TABLE_MODE == 'sync':
+		ready: bool = prepare_sync_table(cursor, category_name)
+	else:
+		ready: bool = create_table(cursor, category_name, FAST_LOAD)
+
+	if ready and JUNCTIONS:
+		ready = create_junction_tables(cursor, category_name)
+
+	if FAST_LOAD:
+		record_metrics('create_table', category_name, seconds=time.perf_counter() - start)
+
+	return ready
+
+def end_table(cursor, category_name) -> bool:
+	""" Finishes the table of `category_name` once all its rows are loaded, according to `TABLE_MODE`.
+		Returns `True` or `False`, if the table was finished successfully or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category
+
+			Returns:
+				Returns `True` or `False`, if the table was finished successfully or not.
+	"""
+	if TABLE_MODE == 'sync' and not merge_sync_table(cursor, category_name):
+		return False
+
+	if JUNCTIONS and not finish_junction_tables(cursor, category_name):
+		return False
+
+	if FAST_LOAD:
+		return finish_fast_load(cursor, category_name)
+
+	return True
+
+def finish_fast_load(cursor, category_name) -> bool:
+	""" Finishes the tables of `category_name` that were created UNLOGGED and without their primary keys, 
+		once they're loaded: adds the primary keys, which builds each index in one pass instead of row by 
+		row, then makes the tables logged, so they survive a crash. Prints how long each step took.
+		Returns `True` or `False`, if the tables were finished successfully or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category
+
+			Returns:
+				Returns `True` or `False`, if the tables were finished successfully or not.
+	"""
+	table_names: list = [category_name]
+
+	if JUNCTIONS:
+		table_names += [junction_table_name(category_name, relationship) for relationship in SCHEMA[category_name]['relationships']]
+
+	try:
+		start: float = time.perf_counter()
+
+		for table_name in table_names:
+			key: list = SCHEMA[table_name]['key']
+
+			if len(key) > 0:
+				cursor.execute(f'''ALTER TABLE {table_name} ADD PRIMARY KEY ({', '.join(key)});''')
+
+		key_seconds: float = time.perf_counter() - start
+		start = time.perf_counter()
+
+		for table_name in table_names:
+			cursor.execute(f'''ALTER TABLE {table_name} SET LOGGED;''')
+
+		logged_seconds: float = time.perf_counter() - start
+
+	except Exception as err:
+		print('An exception occurred while adding the primary key and logging the table: ', err)
+		return False
+
+	record_metrics('primary_key', category_name, seconds=key_seconds)
+	record_metrics('set_logged', category_name, seconds=logged_seconds)
+
+	created_seconds: float = METRICS['create_table']['categories'][category_name]['seconds']
+	print(f'Fast-loaded {category_name}: created in {created_seconds:.2f}s, primary key added in {key_seconds:.2f}s, set logged in {logged_seconds:.2f}s')
+
+	return True
+
+def sync_key(category_name) -> list:
+	""" Returns the columns the rows of `category_name` are matched on when syncing: the id read from the 
+		resource url with `JUNCTIONS`, otherwise the natural key, such as `name`.
+
+			Parameters:
+				category_name (str): The name of the category
+
+			Returns:
+				columns (list): The names of the columns
+	"""
+	schema: dict = SCHEMA[category_name]
+
+	if JUNCTIONS and schema['generated_key']:
+		return schema['key']
+
+	return schema['natural_key']
+
+def prepare_sync_table(cursor, category_name) -> bool:
+	""" Creates the table of `category_name` if it doesn't exist yet, instead of dropping it, and makes sure 
+		it has a `row_hash` column and a unique index on its natural key, if that's what the rows are 
+		matched on, see `sync_key`. The rows are then loaded into a 
+		temporary staging table with the same columns, which `merge_sync_table` merges into the table.
+		Returns `True` or `False`, if the tables are ready or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category
+
+			Returns:
+				Returns `True` or `False`, if the tables are ready or not.
+	"""
+	schema: dict = SCHEMA[category_name]
+	match_key: list = sync_key(category_name)
+
+	try:
+		cursor.execute(build_create_table_query(category_name, if_not_exists=True))
+		cursor.execute(f'''ALTER TABLE {category_name} ADD COLUMN IF NOT EXISTS row_hash TEXT;''')
+
+		if match_key != schema['key']:
+			cursor.execute(f'''CREATE UNIQUE INDEX IF NOT EXISTS {category_name}_natural_key ON {category_name} ({', '.join(match_key)});''')
+
+		cursor.execute(f'''CREATE TEMP TABLE {load_table_name(category_name)} ON COMMIT DROP AS 
+			SELECT {schema['header']} FROM {category_name} WITH NO DATA;''')
+
+		return True
+
+	except Exception as err:
+		print('An exception occurred while preparing the table for syncing: ', err)
+		return False
+
+def merge_sync_table(cursor, category_name) -> bool:
+	""" Merges the staging table of `category_name` into its table, matching rows on their `sync_key`: new 
+		rows are inserted, rows whose hash changed are updated and rows that are no longer in the data are 
+		deleted. Unchanged rows aren't written at all. Prints how many rows were inserted, updated, deleted 
+		and left unchanged. Rows without a key or a natural key can't be matched, so the merge is refused if 
+		there are any.
+		Returns `True` or `False`, if the merge was successful or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category
+
+			Returns:
+				Returns `True` or `False`, if the merge was successful or not.
+	"""
+	schema: dict = SCHEMA[category_name]
+	header: str = schema['header']
+	match_key: list = sync_key(category_name)
+	staging_table: str = load_table_name(category_name)
+	columns: list = [column.strip() for column in header.split(',')]
+	updates: str = ', '.join(f'{column} = EXCLUDED.{column}' for column in columns if not column in match_key)
+	key_match: str = ' AND '.join(f'{staging_table}.{column} = {category_name}.{column}' for column in match_key)
+	key_columns: list = match_key + [column for column in schema['natural_key'] if not column in match_key]
+	key_missing: str = ' OR '.join(f'{column} IS NULL' for column in key_columns)
+
+	try:
+		cursor.execute(f'''SELECT count(*), count(*) FILTER (WHERE {key_missing}) FROM {staging_table};''')
+		row_count, missing_count = cursor.fetchone()
+
+		if missing_count > 0:
+			print(f'Unable to sync {category_name}: {missing_count} rows are missing their {" or ".join(key_columns)}')
+			return False
+
+		# xmax is 0 for a freshly inserted row, and the WHERE skips rows whose hash is unchanged
+		cursor.execute(f'''INSERT INTO {category_name} ({header}, row_hash) 
+			SELECT {header}, md5({staging_table}::text) FROM {staging_table}
+			ON CONFLICT ({', '.join(match_key)}) DO UPDATE SET {updates}, row_hash = EXCLUDED.row_hash
+			WHERE {category_name}.row_hash IS DISTINCT FROM EXCLUDED.row_hash
+			RETURNING (xmax = 0);''')
+		written: list = cursor.fetchall()
+		inserted: int = sum(1 for (is_insert,) in written if is_insert)
+		updated: int = len(written) - inserted
+
+		cursor.execute(f'''DELETE FROM {category_name} WHERE NOT EXISTS (SELECT 1 FROM {staging_table} WHERE {key_match});''')
+		deleted: int = cursor.rowcount
+
+		print(f'Synced {category_name}: {inserted} inserted, {updated} updated, {deleted} deleted, {row_count - inserted - updated} unchanged')
+
+		return True
+
+	except Exception as err:
+		print('An exception occurred while syncing the table: ', err)
+		return False
+
+def junction_table_name(category_name, relationship: dict) -> str:
+	""" Returns the name of the junction table of a relationship of `category_name`, such as `people_films`.
+
+			Parameters:
+				category_name (str): The name of the category
+				relationship (dict): The relationship in `SCHEMA`
+
+			Returns:
+				table_name (str): The name of the junction table
+	"""
+	return f'{category_name}_{relationship["field"]}'
+
+def key_column(category_name) -> tuple:
+	""" Returns the name and type of the column a junction table references the table of `category_name` 
+		with, such as `('people_id', 'INTEGER NOT NULL')`.
+
+			Parameters:
+				category_name (str): The name of the category
+
+			Returns:
+				key_column (tuple): The name and type of the column
+	"""
+	schema: dict = SCHEMA[category_name]
+	key: str = schema['key'][0]
+
+	if schema['generated_key']:
+		return (f'{category_name}_{key}', 'INTEGER NOT NULL')
+
+	column_type: str = next(column['column_type'] for column in schema['columns'] if column['column_name'] == key)
+
+	return (f'{category_name}_{key}', column_type)
+
+def entity_key(category_name, entity: dict) -> int:
+	""" Returns the key of `entity` in the table of `category_name`: the resource id of its url if the 
+		table's key is generated, else its key field, such as the `episode_id` of a film.
+
+			Parameters:
+				category_name (str): The name of the category of the entity
+				entity (dict): The entity
+
+			Returns:
+				key (int): The key of the entity
+	"""
+	schema: dict = SCHEMA[category_name]
+
+	if schema['generated_key']:
+		return resource_id(entity['url'])
+
+	return entity[schema['key'][0]]
+
+def build_junction_schemas(category_names: list):
+	""" Adds the junction table of every relationship of the categories in `category_names` to `SCHEMA`, 
+		such as `people_films` with the `people_id` and `films_episode_id` columns, so they're created and 
+		loaded like any other table. The key of a junction table is both of its columns.
+
+			Parameters:
+				category_names (list): The names of the categories to add the junction tables of
+	"""
+	for category_name in category_names:
+		for relationship in SCHEMA[category_name]['relationships']:
+			columns: list = [key_column(category_name), key_column(relationship['references'])]
+
+			SCHEMA[junction_table_name(category_name, relationship)] = {
+				'header': '',
+				'value_format': '',
+				'generated_key': False,
+				'key': [column_name for column_name, _ in columns],
+				'natural_key': [column_name for column_name, _ in columns],
+				'relationships': [],
+				'columns': [
+					{
+						'column_name': column_name,
+						'column_type': column_type,
+						'array_parse': False
+					} for column_name, column_type in columns
+				]
+			}
+
+def junction_entries(category_name, relationship: dict, entries) -> Iterator[dict]:
+	""" Pairs the key of every entry in `entries` with the key of every entity in its relationship field.
+
+			Parameters:
+				category_name (str): The name of the category of the entries
+				relationship (dict): The relationship in `SCHEMA`
+				entries (list): The entries of the category
+
+			Returns:
+				entries (Iterator[dict]): The entries of the junction table, yielded one at a time
+	"""
+	source_column, target_column = SCHEMA[junction_table_name(category_name, relationship)]['key']
+	target_name: str = relationship['references']
+	field: str = relationship['field']
+
+	if SCHEMA[target_name]['generated_key']:
+		target_key = resource_id
+	else:
+		target_key = lambda url: entity_key(target_name, find_entity(url, target_name))
+
+	for entry in entries:
+		source_key: int = entity_key(category_name, entry)
+
+		# A url that's listed twice is still a single relationship
+		for url in dict.fromkeys(entry[field]):
+			yield {source_column: source_key, target_column: target_key(url)}
+
+class JunctionEntries:
+	""" The entries of a junction table, see `junction_entries`, paired up again each time they're iterated, 
+		so a refused COPY can read them twice without the whole table being held in memory.
+	"""
+
+	def __init__(self, category_name, relationship: dict, entries):
+		self.category_name: str = category_name
+		self.relationship: dict = relationship
+		self.entries = entries
+
+	def __iter__(self):
+		return junction_entries(self.category_name, self.relationship, self.entries)
+
+def create_junction_tables(cursor, category_name) -> bool:
+	""" Creates the junction tables of `category_name`.
+		Returns `True` or `False`, if the tables were created successfully or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category
+
+			Returns:
+				Returns `True` or `False`, if the tables were created successfully or not.
+	"""
+	for relationship in SCHEMA[category_name]['relationships']:
+		if not create_table(cursor, junction_table_name(category_name, relationship), FAST_LOAD):
+			return False
+
+	return True
+
+def populate_junction_tables(cursor, category_name, entries: list = None) -> bool:
+	""" Populates the junction tables of `category_name` from its entries, once they're in its table. The 
+		entities are looked up as the rows are loaded, so one that wasn't fetched fails the load, like any 
+		other bad row, see `populate_table`.
+		Returns `True` or `False`, if the tables were populated successfully or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category
+				entries (list): The entries of the category (DEFAULT: `DATA[category_name]`)
+
+			Returns:
+				Returns `True` or `False`, if the tables were populated successfully or not.
+	"""
+	if entries is None:
+		entries = DATA[category_name]
+
+	for relationship in SCHEMA[category_name]['relationships']:
+		table_name: str = junction_table_name(category_name, relationship)
+
+		if not populate_table(cursor, table_name, JunctionEntries(category_name, relationship, entries)):
+			return False
+
+	return True
+
+def finish_junction_tables(cursor, category_name) -> bool:
+	""" Indexes the referenced side of the junction tables of `category_name` once they're populated, the 
+		referencing side being covered by their primary key. Moves the sequence of a generated key past the 
+		resource ids that were loaded into it.
+		Returns `True` or `False`, if the tables were finished successfully or not.
+
+			Parameters:
+				cursor (Cursor): Allows Python to execute PostgreSQL command in a database session
+				category_name (str): The name of the category
+
+			Returns:
+				Returns `True` or `False`, if the tables were finished successfully or not.
+	"""
+	schema: dict = SCHEMA[category_name]
+
+	try:
+		if schema['generated_key']:
+			key: str = schema['key'][0]
+			cursor.execute(f'''SELECT setval(pg_get_serial_sequence('{category_name}', '{key}'), 
+				COALESCE(MAX({key}), 0) + 1, false) FROM {category_name};''')
+
+		for relationship in schema['relationships']:
+			table_name: str = junction_table_name(category_name, relationship)
+			target_column: str = SCHEMA[table_name]['key'][1]
+			cursor.execute(f'''CREATE INDEX {table_name}_{target_column} ON {table_name} ({target_column});''')
+
+		return True
+
+	except Exception as err:
+		print('An exception occurred while indexing the junction tables: ', err)
+		return False
+
+def open_connections(count: int) -> list:
+	""" Opens `count` connections to the database, which make up the connection pool.
+
+			Parameters:
+				count (int): The number of connections to open
+
+			Returns:
+				connections (list): The open Psycopg2 connections
+	"""
+	connections: list = []
+
+	try:
+		for _ in range(count):
+			connections.append(psycopg2.connect(
+				host = HOSTNAME,
+				dbname = DATABASE,
+				user = USERNAME,
+				password = PWD,
+				port = PORT_ID))
+
+	except Exception:
+		for connection in connections:
+			connection.close()
+
+		raise
+
+	return connections
+
+def make_pool(connections: list) -> asyncio.Queue:
+	""" Puts `connections` in a queue that categories check connections out of and back into. 
+		A checked out connection is only used by one category, on one worker thread, at a time.
+
+			Parameters:
+				connections (list): The connections from `open_connections`
+
+			Returns:
+				pool (asyncio.Queue): The connections available for checkout
+	"""
+	pool = asyncio.Queue()
+
+	for connection in connections:
+		pool.put_nowait(connection)
+
+	return pool
+
+def prepare_swap(connections: list) -> str:
+	""" Creates `SWAP_SCHEMA`, the schema the tables are staged in when swapping, and points the search path 
+		of every connection at it, so the tables are dropped, created and loaded there under their own names 
+		while the live tables are left alone. Returns the schema of the live tables, the first schema of the 
+		search path the connections started with, or `None` if there is none.
+
+			Parameters:
+				connections (list): The connections from `open_connections`
+
+			Returns:
+				live_schema (str): The schema of the live tables
+	"""
+	cursor = connections[0].cursor()
+
+	try:
+		cursor.execute('''SELECT current_schema();''')
+		live_schema: str = cursor.fetchone()[0]
+
+		# Committed straight away, so the other connections can see it
+		cursor.execute(f'''CREATE SCHEMA IF NOT EXISTS {SWAP_SCHEMA};''')
+		connections[0].commit()
+
+	finally:
+		cursor.close()
+
+	for connection in connections:
+		cursor = connection.cursor()
+		cursor.execute(f'''SET search_path TO {SWAP_SCHEMA};''')
+		cursor.close()
+
+		# A session setting, kept by the commit, which leaves the connection ready for `begin_two_phase`
+		connection.commit()
+
+	return live_schema
+
+def swap_tables(connection, category_names: list, live_schema: str) -> bool:
+	""" Swaps the staged tables of `category_names`, and their junction tables, in for the live ones in one 
+		transaction, once they're committed: each live table is dropped and its staged copy moved into 
+		`live_schema`, along with its indexes and sequences. Readers see either all the old tables or all 
+		the new ones. The locks on the live tables are only held from the first drop to the commit, which 
+		is printed, and the swap gives up if it waits more than `SWAP_LOCK_TIMEOUT` for a lock.
+		Returns `True` or `False`, if the tables were swapped in or not.
+
+			Parameters:
+				connection (Connection): A Psycopg2 connection
+				category_names (list): The names of the categories that were loaded
+				live_schema (str): The schema of the live tables, from `prepare_swap`
+
+			Returns:
+				Returns `True` or `False`, if the tables were swapped in or not.
+	"""
+	table_names: list = []
+
+	for category_name in category_names:
+		table_names.append(category_name)
+
+		if JUNCTIONS:
+			table_names += [junction_table_name(category_name, relationship) for relationship in SCHEMA[category_name]['relationships']]
+
+	cursor = connection.cursor()
+	start: float = time.perf_counter()
+
+	try:
+		cursor.execute(f'''SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}';''')
+
+		for table_name in table_names:
+			cursor.execute(f'''DROP TABLE IF EXISTS {live_schema}.{table_name};''')
+			cursor.execute(f'''ALTER TABLE {SWAP_SCHEMA}.{table_name} SET SCHEMA {live_schema};''')
+
+		connection.commit()
+
+	except Exception as err:
+		connection.rollback()
+		print('An exception occurred while swapping in the tables, the staged tables were left in ' + SWAP_SCHEMA + ': ', err)
+		return False
+
+	finally:
+		cursor.close()
+
+	seconds: float = time.perf_counter() - start
+	record_metrics('swap', seconds=seconds)
+	print(f'Swapped in {len(table_names)} tables, holding their locks for {seconds * 1000:.1f}ms')
+
+	return True
+
+def begin_two_phase(connections: list) -> bool:
+	""" Begins a two-phase transaction on every connection, so that `finish_connections` can prepare them 
+		all before committing any, if the server allows enough prepared transactions 
+		(`max_prepared_transactions`, which is `0` by default). Syncing stages its rows in temporary tables, 
+		which can't be prepared, so its connections are committed one after another.
+		Returns `True` or `False`, if the two-phase transactions were begun or not.
+
+			Parameters:
+				connections (list): The connections from `open_connections`, outside of any transaction
+
+			Returns:
+				Returns `True` or `False`, if the two-phase transactions were begun or not.
+	"""
+	if len(connections) < 2 or TABLE_MODE == 'sync':
+		return False
+
+	cursor = connections[0].cursor()
+
+	try:
+		cursor.execute('''SHOW max_prepared_transactions;''')
+		available: int = int(cursor.fetchone()[0])
+
+	finally:
+		cursor.close()
+		connections[0].rollback()
+
+	if available < len(connections):
+		return False
+
+	transaction_id: str = f'swapi-{os.getpid()}-{time.time_ns()}'
+
+	for index, connection in enumerate(connections):
+		connection.tpc_begin(connection.xid(0, transaction_id, str(index)))
+
+	return True
+
+def finish_connections(connections: list, success: bool, two_phase: bool = False) -> bool:
+	""" Commits every connection if all the categories were loaded, otherwise rolls them all back.
+		With `two_phase`, from `begin_two_phase`, every connection is prepared before any is committed, so 
+		a run either replaces every table or none of them. Otherwise the connections are committed one 
+		after another, and if a commit fails, the tables of the connections committed before it stay 
+		replaced, which is printed, while the rest are rolled back.
+		Returns `True` or `False`, if every connection was committed or not.
+
+			Parameters:
+				connections (list): The connections from `open_connections`
+				success (bool): Whether every category was loaded
+				two_phase (bool): Whether the connections are in two-phase transactions (DEFAULT: `False`)
+
+			Returns:
+				Returns `True` or `False`, if every connection was committed or not.
+	"""
+	if not success:
+		for connection in connections:
+			if two_phase:
+				connection.tpc_rollback()
+			else:
+				connection.rollback()
+
+		return False
+
+	if two_phase:
+		try:
+			for connection in connections:
+				connection.tpc_prepare()
+
+		except Exception as err:
+			print('An exception occurred while preparing the transactions, nothing was committed: ', err)
+
+			for connection in connections:
+				try:
+					connection.tpc_rollback()
+				except Exception:
+					pass
+
+			return False
+
+	for index, connection in enumerate(connections):
+		try:
+			if two_phase:
+				connection.tpc_commit()
+			else:
+				connection.commit()
+
+		except Exception as err:
+			committed_names: list = [name for committed in connections[:index] for name in CONNECTION_TABLES.get(committed, [])]
+
+			if two_phase:
+				print('An exception occurred while committing the prepared transactions: ', err)
+				print('The remaining tables stay prepared and can be committed with COMMIT PREPARED, see pg_prepared_xacts')
+			else:
+				print('An exception occurred while committing the tables, the tables of the remaining connections were rolled back: ', err)
+
+				for remaining in connections[index + 1:]:
+					try:
+						remaining.rollback()
+					except Exception:
+						pass
+
+			print('Committed: ' + (', '.join(committed_names) if len(committed_names) > 0 else 'none'))
+
+			return False
+
+	return True
+
+def load_category(connection, category_name) -> bool:
+	""" Creates (or, when syncing, prepares) and populates the table of `category_name` on `connection`, 
+		without committing.
+		Returns `True` or `False`, if the table was created and populated successfully or not.
+
+			Parameters:
+				connection (Connection): A Psycopg2 connection checked out of the pool
+				category_name (str): The name of the table to create and populate
+
+			Returns:
+				Returns `True` or `False`, if the table was created and populated successfully or not.
+	"""
+	cursor = connection.cursor()
+	CONNECTION_TABLES.setdefault(connection, []).append(category_name)
+
+	try:
+		if VERBOSE:
+			print ('Constructing %s table..', category_name)
+
+		with profile_phase('ddl'):
+			if not begin_table(cursor, category_name):
+				return False
+
+		if VERBOSE:
+			print ('Populating %s table..', category_name)
+
+		if not populate_table(cursor, category_name, table_name=load_table_name(category_name)):
+			return False
+
+		if JUNCTIONS and not populate_junction_tables(cursor, category_name):
+			return False
+
+		with profile_phase('db'):
+			if not end_table(cursor, category_name):
+				return False
+
+		if VERBOSE:
+			print(f'{category_metrics("transform", category_name).get("rows", 0)} {category_name} records inserted')
+
+		return True
+
+	finally:
+		cursor.close()
+
+async def load_categories(connections: list, category_names: list) -> bool:
+	""" Creates and populates the table of every category in `category_names` concurrently, each one on a 
+		connection checked out of the pool, with the blocking Psycopg2 calls run on worker threads so the 
+		event loop isn't blocked. Nothing is committed, see `finish_connections`. The transform workers, if 
+		any were started, are shut down once every table is loaded.
+		Returns `True` or `False`, if every table was created and populated successfully or not.
+
+			Parameters:
+				connections (list): The connections from `open_connections`
+				category_names (list): The names of the categories to load
+
+			Returns:
+				Returns `True` or `False`, if every table was created and populated successfully or not.
+	"""
+	loop = asyncio.get_running_loop()
+	db_executor = ThreadPoolExecutor(max_workers=len(connections))
+	pool: asyncio.Queue = make_pool(connections)
+
+	async def load_timed_category(category_name: str) -> bool:
+		connection = await pool.get()
+		start: float = time.perf_counter()
+
+		try:
+			loaded: bool = await loop.run_in_executor(db_executor, load_category, connection, category_name)
+		finally:
+			pool.put_nowait(connection)
+
+		if loaded:
+			elapsed: float = time.perf_counter() - start
+			print(f'Loaded {category_name} in {elapsed:.2f}s')
+
+			# The rows are counted as they're loaded, as a lazily read category would be read again by len()
+			transform: dict = category_metrics('transform', category_name)
+			record_metrics('load', category_name, seconds=elapsed - transform.get('seconds', 0), rows=transform.get('rows', 0))
+
+		return loaded
+
+	try:
+		results: list = await asyncio.gather(*[load_timed_category(name) for name in SCHEMA if name in category_names])
+	finally:
+		db_executor.shutdown()
+		close_transform_executor()
+
+	return all(results)
+
+async def stream_categories(connections: list, category_names: list, filename: str, path: str) -> bool:
+	""" Streams every category in `category_names` from SWAPI straight into its table, instead of collecting 
+		the whole dataset in DATA first. Each category's pages pass through a queue of at most `QUEUE_SIZE` 
+		pages to a consumer that creates its table on a connection checked out of the pool, then loads the 
+		pages, and appends them to the cache if caching is enabled, while the next pages are fetched. The 
+		loads run on worker threads, so the event loop keeps fetching while PostgreSQL works. Nothing is 
+		committed, see `finish_connections`.
+		Categories that reference another streamed category, such as a `homeworld` column referencing the 
+		planets, wait for it to be loaded, as the references resolve through `ENTITY_INDEX`. A streamed 
+		category that any category of the run references is indexed, so the categories loaded after the 
+		stream, see `load_categories`, can resolve their references too.
+		Returns `True` or `False`, if every category was streamed successfully or not.
+
+			Parameters:
+				connections (list): The connections from `open_connections`
+				category_names (list): The names of the categories to stream
+				filename (str): The root name of the exported file (DEFAULT: `swapi_data`)
+				path (str): The path to the directory of the exported file (DEFAULT: `./bin/`)
+
+			Returns:
+				Returns `True` or `False`, if every category was streamed successfully or not.
+	"""
+	loop = asyncio.get_running_loop()
+	db_executor = ThreadPoolExecutor(max_workers=len(connections))
+	pool: asyncio.Queue = make_pool(connections)
+	semaphore = asyncio.Semaphore(CATEGORY_CONCURRENCY)
+	record_counts: dict = {}
+
+	manifest: dict = read_manifest(filename, path) if CACHE else {}
+
+	# The referenced categories go first, so a low category concurrency or pool size can't leave a category waiting on them forever
+	referenced_names: set = set()
+
+	for category_name in CATEGORY_NAMES:
+		referenced_names |= referenced_categories(category_name)
+
+	category_names = sorted(category_names, key=lambda name: not name in referenced_names)
+	indexed: dict = {name: asyncio.Event() for name in category_names if name in referenced_names}
+
+	async def fetch_into_queue(session: ClientSession, category_name: str, queue: asyncio.Queue) -> bool:
+		fetched: bool = False
+
+		try:
+			async with semaphore:
+				start: float = time.perf_counter()
+				fetched = await fetch_category_pages(session, category_name, queue)
+
+				record_metrics('fetch', category_name, seconds=time.perf_counter() - start)
+
+		except Exception as err:
+			print('An exception occurred while streaming ' + category_name + ': ', err)
+
+		finally:
+			# The loader stops at the sentinel however the fetch ended, so it never waits on an empty queue
+			await queue.put(None)
+
+		return fetched
+
+	async def load_from_queue(category_name: str, queue: asyncio.Queue, writer) -> int:
+		waits_for: list = [indexed[name] for name in referenced_categories(category_name) if name in indexed and name != category_name]
+		record_count: int = 0
+		connection = await pool.get()
+		cursor = connection.cursor()
+		CONNECTION_TABLES.setdefault(connection, []).append(category_name)
+
+		try:
+			if not await loop.run_in_executor(db_executor, begin_table, cursor, category_name):
+				return -1
+
+			while True:
+				entries = await queue.get()
+
+				if entries is None:
+					if not await loop.run_in_executor(db_executor, end_table, cursor, category_name):
+						return -1
+
+					return record_count
+
+				if category_name in indexed:
+					index_entities(entries)
+
+				for event in waits_for:
+					await event.wait()
+
+				if writer is not None:
+					start: float = time.perf_counter()
+					writer.append(entries)
+
+					record_metrics('cache_write', category_name, seconds=time.perf_counter() - start, rows=len(entries))
+
+				start: float = time.perf_counter()
+				transform_seconds: float = category_metrics('transform', category_name).get('seconds', 0)
+
+				if not await loop.run_in_executor(db_executor, populate_table, cursor, category_name, entries, load_table_name(category_name)):
+					return -1
+
+				if JUNCTIONS and not await loop.run_in_executor(db_executor, populate_junction_tables, cursor, category_name, entries):
+					return -1
+
+				transform_seconds = category_metrics('transform', category_name).get('seconds', 0) - transform_seconds
+
+				record_count += len(entries)
+				record_metrics('fetch', category_name, rows=len(entries))
+				record_metrics('load', category_name, seconds=time.perf_counter() - start - transform_seconds, rows=len(entries))
+
+		finally:
+			cursor.close()
+			pool.put_nowait(connection)
+
+	async def stream_category(session: ClientSession, category_name: str) -> bool:
+		queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+		producer = asyncio.ensure_future(fetch_into_queue(session, category_name, queue))
+		writer = open_cache_writer(cache_part_path(filename, path, category_name)) if CACHE else None
+		start: float = time.perf_counter()
+		record_count: int = -1
+
+		try:
+			record_count = await load_from_queue(category_name, queue, writer)
+
+		finally:
+			if writer is not None and record_count >= 0:
+				writer.finish()
+			elif writer is not None:
+				writer.close()
+
+			if category_name in indexed:
+				indexed[category_name].set()
+
+			if record_count < 0:
+				producer.cancel()
+
+				# Nothing reads the queue anymore, so it's emptied to make room for the producer's sentinel
+				while not queue.empty():
+					queue.get_nowait()
+
+		# The producer is always awaited, so a fetch that failed is reported along with the load
+		fetched: bool = (await asyncio.gather(producer, return_exceptions=True))[0] is True
+
+		if record_count < 0 or not fetched:
+			return False
+
+		elapsed: float = time.perf_counter() - start
+		print(f'Streamed {record_count} {category_name} records in {elapsed:.2f}s')
+
+		record_counts[category_name] = record_count
+
+		return True
+
+	try:
+		async with make_session() as session:
+			results: list = await asyncio.gather(*[stream_category(session, name) for name in category_names])
+
+	finally:
+		db_executor.shutdown()
+
+	print_fetch_counts()
+
+	if not all(results):
+		for category_name in category_names:
+			part_path: str = cache_part_path(filename, path, category_name)
+
+			if Path(part_path).exists():
+				os.remove(part_path)
+
+		return False
+
+	if CACHE:
+		for category_name in category_names:
+			commit_cache_part(filename, path, category_name, record_counts[category_name], manifest)
+			write_validators(filename, path, category_name, manifest)
+
+		write_manifest(filename, path, manifest)
+
+	return True
+
+def parse_int_flag(arg: str, minimum: int = 1):
+	""" Parses the whole number value of a `-flag=value` argument.
+		Returns the value, or `None` if the value is malformed, after printing why.
+
+			Parameters:
+				arg (str): The argument, including the flag name
+				minimum (int): The smallest accepted value (DEFAULT: `1`)
+
+			Returns:
+				value (int): The parsed value, or `None` if the value is malformed
+	"""
+	if arg.count('=') > 1:
+		print('Invalid syntax: Too many = in the flag %s' % arg)
+		return None
+
+	value: str = arg[arg.index('=') + 1:]
+
+	if not value.isdigit() or int(value) < minimum:
+		print(f'Invalid syntax: {value} is not a valid option. Options: a whole number of at least {minimum}')
+		return None
+
+	return int(value)
+
+def print_help():
+	""" Prints out the help menu to the terminal. """
+
+	print('Usage: python ./script.py ([options])')
+	print('Example:')
+	print('\tpython ./script.py -db=some_database')
+	print('\tpython ./script.py -p=5433')
+	print('\tpython ./script.py -c=false')
+	print('\tpython ./script.py -d="./bin/custom_data.json"')
+	print('\tpython ./script.py -f')
+	print('\tpython ./script.py --cache=false')
+	print('\tpython ./script.py --force')
+	print('\tpython ./script.py --format=false')
+	print('\tpython ./script.py -c=false -v -fmt=false')
+	print('\tpython ./script.py -c=false --verbose')
+	print('\tpython ./script.py --cache=false --verbose')
+	print('\tpython ./script.py --data="./bin/some_custom_data.json"')
+	print('\tpython ./script.py -pc=8')
+	print('\tpython ./script.py -cc=2')
+	print('\tpython ./script.py -f -pc=8 -rl=10 -mr=10')
+	print('\tpython ./script.py -f -pc=8 -hl=8 -ka=60 -t=10 -v')
+	print('\tpython ./script.py -m=./metrics.json -prom=./swapi.prom')
+	print('\tpython ./script.py -f --profile')
+	print('\tpython ./script.py --load=insert')
+	print('\tpython ./script.py -l=batch -bs=1000')
+	print('\tpython ./script.py -f -s -qs=8')
+	print('\tpython ./script.py -ps=6')
+	print('\tpython ./script.py -d="./bin/some_custom_data.ndjson" -tw=4')
+	print('\tpython ./script.py --refresh=people,planets')
+	print('\tpython ./script.py -f -cf=binary -z')
+	print('\tpython ./script.py --table-mode=sync')
+	print('\tpython ./script.py -tm=swap')
+	print('\tpython ./script.py -j')
+	print('\tpython ./script.py -f -fl')
+	print('\n')
+	print('Options:')
+	print('-db, --database\t\tName of the database to connect to (DEFAULT="bootcamp")')
+	print('\t\t\t\t-db=some_db')
+	print('\t\t\t\t-database=some_other_db')
+	print('-h, --host\t\tThe host to connect to (DEFAULT=localhost)')
+	print('\t\t\t\t-h="localhost"')
+	print('\t\t\t\t--host="localhost"')
+	print('-u, --user\t\tThe postgres user(DEFAULT=BOOTCAMP_USER[Environment Variable]')
+	print('\t\t\t\t-u=some-user')
+	print('\t\t\t\t--user=other-user')
+	print('-pw, --password\t\tThe password to the postgres user(DEFAULT=BOOTCAMP_CREDS[Environment Variable]')
+	print('\t\t\t\t-pw="$0m3P@$$w0rd"')
+	print('\t\t\t\t--password="$0m3P@$$w0rd"')
+	print('-p, --port\t\tThe port to connect to (DEFAULT=5432)')
+	print('\t\t\t\t-p=5433')
+	print('\t\t\t\t--port=5434')
+	print('-d, --data\t\tUse a modified version of the dataset, .ndjson/.jsonl datasets are streamed a record at a time')
+	print('\t\t\t\t-d="./bin/custom_data.json"')
+	print('\t\t\t\t--data="./bin/some_custom_data.json"')
+	print('-c, --cache\t\tWhether or not to cache and use the cached results (Default=true)')
+	print('\t\t\tDisable caching and the use of any existing cache:')
+	print('\t\t\t\t-c=false')
+	print('\t\t\t\t--cache=false')
+	print('-fmt, --format\t\tFormat the fields to be consistent (DEFAULT=true)')
+	print('\t\t\t\t-fmt=false')
+	print('\t\t\t\t--format=false')
+	print('\t\t\tDisable consistency formatting:')
+	print("-f, --force\t\tForce a cache update")
+	print('-r, --refresh\t\tRefetch only the listed categories, reading the rest from the cache')
+	print('\t\t\t\t-r=people')
+	print('\t\t\t\t--refresh=people,planets')
+	print('-cf, --cache-format\tThe format categories are cached in, a cached category is read in whichever format it was written (DEFAULT=json)')
+	print('\t\t\tjson: A JSON array per category')
+	print('\t\t\tbinary: Compact records with an offset index, memory-mapped and read record by record')
+	print('\t\t\t\t-cf=binary')
+	print('\t\t\t\t--cache-format=binary')
+	print('-z, --compress\t\tCompress the records of a binary cache')
+	print('-tm, --table-mode\tHow the tables are updated (DEFAULT=reload)')
+	print('\t\t\treload: Drop and recreate every table, then load every row')
+	print('\t\t\tsync: Keep the tables, insert new rows, update changed rows and delete missing rows')
+	print('\t\t\tswap: Load every table into a staging copy, then swap the copies in at once, so readers never see a table half loaded')
+	print('\t\t\t\t-tm=sync')
+	print('\t\t\t\t--table-mode=sync')
+	print('-j, --junctions\t\tAlso load the relationships into junction tables, such as people_films, keyed by resource id')
+	print('-fl, --fast-load\tCreate the tables UNLOGGED and without their primary keys, then add the keys and SET LOGGED once they are loaded')
+	print('-cm, --compact\t\tHold the records in memory as compact objects with only the loaded fields, to load larger datasets')
+	print('-pc, --page-concurrency\tFetch the pages of a category concurrently, at most N at a time (DEFAULT=1)')
+	print('\t\t\t\t-pc=8')
+	print('\t\t\t\t--page-concurrency=8')
+	print('-cc, --category-concurrency\tFetch at most N categories at the same time (DEFAULT=6)')
+	print('\t\t\t\t-cc=2')
+	print('\t\t\t\t--category-concurrency=2')
+	print('-mr, --max-retries\tRetry a throttled, failed or timed out request up to N times before giving up (DEFAULT=5)')
+	print('\t\t\t\t-mr=10')
+	print('\t\t\t\t--max-retries=10')
+	print('-rl, --rate-limit\tSend at most N requests per second across every category, 0 for no limit (DEFAULT=0)')
+	print('\t\t\t\t-rl=10')
+	print('\t\t\t\t--rate-limit=10')
+	print('-cl, --connection-limit\tOpen at most N HTTP connections, 0 for no limit (DEFAULT=100)')
+	print('\t\t\t\t-cl=20')
+	print('\t\t\t\t--connection-limit=20')
+	print('-hl, --host-limit\tOpen at most N HTTP connections to the same host, 0 for no limit (DEFAULT=0)')
+	print('\t\t\t\t-hl=8')
+	print('\t\t\t\t--host-limit=8')
+	print('-ka, --keepalive\tKeep idle HTTP connections open for N seconds, 0 to close them after each request (DEFAULT=15)')
+	print('\t\t\t\t-ka=60')
+	print('\t\t\t\t--keepalive=60')
+	print('-dns, --dns-cache\tCache DNS look ups for N seconds, 0 to look the host up for every connection (DEFAULT=10)')
+	print('\t\t\t\t-dns=300')
+	print('\t\t\t\t--dns-cache=300')
+	print('-t, --timeout\t\tGive up on a request after N seconds, it is then retried (DEFAULT=30)')
+	print('\t\t\t\t-t=10')
+	print('\t\t\t\t--timeout=10')
+	print('-gz, --gzip\t\tAsk for gzip or deflate compressed responses (DEFAULT=true)')
+	print('\t\t\t\t-gz=false')
+	print('\t\t\t\t--gzip=false')
+	print('-l, --load\t\tHow rows are loaded into the tables (DEFAULT=copy)')
+	print('\t\t\tcopy: Stream every row of a table through one COPY FROM STDIN')
+	print('\t\t\tbatch: One multi-row INSERT per batch of rows, for servers that refuse COPY')
+	print('\t\t\tinsert: One INSERT per row')
+	print('\t\t\t\t-l=insert')
+	print('\t\t\t\t--load=insert')
+	print('-bs, --batch-size\tThe number of rows per INSERT when loading with --load=batch (DEFAULT=500)')
+	print('\t\t\t\t-bs=1000')
+	print('\t\t\t\t--batch-size=1000')
+	print('-s, --stream\t\tLoad and cache each page as it is fetched, instead of after the whole dataset is fetched')
+	print('\t\t\tOnly applies when fetching from SWAPI')
+	print('-qs, --queue-size\tThe number of fetched pages per category waiting to be loaded when streaming (DEFAULT=4)')
+	print('\t\t\t\t-qs=8')
+	print('\t\t\t\t--queue-size=8')
+	print('-ps, --pool-size\tThe number of database connections the tables are created and loaded on concurrently (DEFAULT=4)')
+	print('\t\t\t\t-ps=6')
+	print('\t\t\t\t--pool-size=6')
+	print('-tw, --transform-workers	The number of processes the rows of large tables are built on, in chunks of 5000 entries (DEFAULT=0, in this process)')
+	print('\t\t\t\t-tw=4')
+	print('\t\t\t\t--transform-workers=4')
+	print('-m, --metrics\t\tWrite the time, rows, rows/s and bytes of every phase and category to a JSON report')
+	print('\t\t\t\t-m=./metrics.json')
+	print('\t\t\t\t--metrics=./metrics.json')
+	print('-prom, --prometheus\tWrite the same metrics as a Prometheus textfile, for the node exporter')
+	print('\t\t\t\t-prom=/var/lib/node_exporter/swapi.prom')
+	print('\t\t\t\t--prometheus=/var/lib/node_exporter/swapi.prom')
+	print('-prof, --profile\tProfile the CPU and memory of every phase, writing the profiles and a summary to a directory (DEFAULT=./profile/)')
+	print('\t\t\tThe tables are then loaded one at a time, and each table\'s rows are built before they are loaded')
+	print('\t\t\t\t-prof')
+	print('\t\t\t\t--profile=./profiles/')
+	print('-v, --verbose\t\tPrints out detailed information of the process')
+	print('')
+	print('General Options: ')
+	print('-h, --help\t\tPrint usage information')
+
+async def main():
+	global VERBOSE, FORCE_CACHE_UPDATE, CACHE, FORMAT, DATABASE, CUSTOM_DATA, PORT_ID, HOSTNAME, PWD, USERNAME
+	global PAGE_CONCURRENCY, CATEGORY_CONCURRENCY, LOAD_METHOD, BATCH_SIZE, STREAM, QUEUE_SIZE, POOL_SIZE, REFRESH_NAMES
+	global CACHE_FORMAT, COMPRESS_CACHE, TABLE_MODE, JUNCTIONS, COMPACT, FAST_LOAD, MAX_RETRIES, RATE_LIMIT, RATE_LIMITER
+	global CONNECTION_LIMIT, HOST_CONNECTION_LIMIT, KEEPALIVE_TIMEOUT, DNS_CACHE_TTL, REQUEST_TIMEOUT, GZIP
+	global METRICS_PATH, PROMETHEUS_PATH, PROFILE_DIRECTORY, TRANSFORM_WORKERS
+	filename: str = 'swapi_data'
+	bin_location: str = './bin'
+	custom_data_path: str = ''
+
+	# Handle args
+	if '-h' in argv or '--help' in argv:
+		print_help()
+
+		return
+
+	arg_len: int = len(argv)
+
+	if arg_len > 1:
+		for i, arg in enumerate(argv):
+			la: str = arg.lower()
+
+			if '-v' == la or '--verbose' == la:
+				VERBOSE = True
+
+			elif la.startswith('-c=') or la.startswith('--cache='):
+				count: int = la.count('=')
+				
+				if count == 1:
+					index: int = la.index('=') + 1
+					value: str = la[index:].lower()
+
+					if (value == 'false' or value == 'f'):
+						CACHE = False
+
+					elif (value == 'true' or value == 't'):
+						print('Redundant cache flag as caching is on by default')
+
+					else:
 						print('Invalid syntax: %s is not a valid option. Options: true/TRUE/t, false/FALSE/f')
 						return
 
@@ -943,12 +3706,278 @@ async def main():
 					print('Invalid syntax: Too many = in the flag %s', la)
 					return
 
+			elif la.startswith('-m=') or la.startswith('--metrics='):
+				count: int = la.count('=')
+
+				if count == 1:
+					METRICS_PATH = arg[la.index('=') + 1:]
+
+				elif count > 1:
+					print('Invalid syntax: Too many = in the flag %s', la)
+					return
+
+			elif la.startswith('-prom=') or la.startswith('--prometheus='):
+				count: int = la.count('=')
+
+				if count == 1:
+					PROMETHEUS_PATH = arg[la.index('=') + 1:]
+
+				elif count > 1:
+					print('Invalid syntax: Too many = in the flag %s', la)
+					return
+
+			elif '-prof' == la or '--profile' == la:
+				PROFILE_DIRECTORY = './profile/'
+
+			elif la.startswith('-prof=') or la.startswith('--profile='):
+				count: int = la.count('=')
+
+				if count == 1:
+					PROFILE_DIRECTORY = arg[la.index('=') + 1:]
+
+				elif count > 1:
+					print('Invalid syntax: Too many = in the flag %s', la)
+					return
+
+			elif la.startswith('-pc=') or la.startswith('--page-concurrency='):
+				value: int = parse_int_flag(la)
+
+				if value is None:
+					return
+
+				PAGE_CONCURRENCY = value
+
+			elif la.startswith('-cc=') or la.startswith('--category-concurrency='):
+				value: int = parse_int_flag(la)
+
+				if value is None:
+					return
+
+				CATEGORY_CONCURRENCY = value
+
+			elif la.startswith('-mr=') or la.startswith('--max-retries='):
+				value: int = parse_int_flag(la, minimum=0)
+
+				if value is None:
+					return
+
+				MAX_RETRIES = value
+
+			elif la.startswith('-rl=') or la.startswith('--rate-limit='):
+				value: int = parse_int_flag(la, minimum=0)
+
+				if value is None:
+					return
+
+				RATE_LIMIT = value
+
+			elif la.startswith('-cl=') or la.startswith('--connection-limit='):
+				value: int = parse_int_flag(la, minimum=0)
+
+				if value is None:
+					return
+
+				CONNECTION_LIMIT = value
+
+			elif la.startswith('-hl=') or la.startswith('--host-limit='):
+				value: int = parse_int_flag(la, minimum=0)
+
+				if value is None:
+					return
+
+				HOST_CONNECTION_LIMIT = value
+
+			elif la.startswith('-ka=') or la.startswith('--keepalive='):
+				value: int = parse_int_flag(la, minimum=0)
+
+				if value is None:
+					return
+
+				KEEPALIVE_TIMEOUT = value
+
+			elif la.startswith('-dns=') or la.startswith('--dns-cache='):
+				value: int = parse_int_flag(la, minimum=0)
+
+				if value is None:
+					return
+
+				DNS_CACHE_TTL = value
+
+			elif la.startswith('-t=') or la.startswith('--timeout='):
+				value: int = parse_int_flag(la)
+
+				if value is None:
+					return
+
+				REQUEST_TIMEOUT = value
+
+			elif la.startswith('-gz=') or la.startswith('--gzip='):
+				count: int = la.count('=')
+
+				if count == 1:
+					index: int = la.index('=') + 1
+					value: str = la[index:].lower()
+
+					if value == 'false' or value == 'f':
+						GZIP = False
+
+					elif (value == 'true' or value == 't'):
+						print('Redundant gzip flag as compression is on by default')
+
+					else:
+						print('Invalid syntax: %s is not a valid option. Options: true/TRUE/t, false/FALSE/f')
+						return
+
+				elif count > 1:
+					print('Invalid syntax: Too many = in the flag %s', la)
+					return
+
+			elif la.startswith('-l=') or la.startswith('--load='):
+				count: int = la.count('=')
+
+				if count == 1:
+					index: int = la.index('=') + 1
+					value: str = la[index:]
+
+					if value not in LOAD_METHODS:
+						print(f'Invalid syntax: {value} is not a valid option. Options: {", ".join(LOAD_METHODS)}')
+						return
+
+					LOAD_METHOD = value
+
+				elif count > 1:
+					print('Invalid syntax: Too many = in the flag %s', la)
+					return
+
+			elif la.startswith('-bs=') or la.startswith('--batch-size='):
+				value: int = parse_int_flag(la)
+
+				if value is None:
+					return
+
+				BATCH_SIZE = value
+
+			elif '-s' == la or '--stream' == la:
+				STREAM = True
+
+			elif la.startswith('-qs=') or la.startswith('--queue-size='):
+				value: int = parse_int_flag(la)
+
+				if value is None:
+					return
+
+				QUEUE_SIZE = value
+
+			elif la.startswith('-ps=') or la.startswith('--pool-size='):
+				value: int = parse_int_flag(la)
+
+				if value is None:
+					return
+
+				POOL_SIZE = value
+
+			elif la.startswith('-tw=') or la.startswith('--transform-workers='):
+				value: int = parse_int_flag(la, minimum=0)
+
+				if value is None:
+					return
+
+				TRANSFORM_WORKERS = value
+
+			elif la.startswith('-r=') or la.startswith('--refresh='):
+				count: int = la.count('=')
+
+				if count == 1:
+					index: int = la.index('=') + 1
+					values: list = [value.strip() for value in la[index:].split(',') if value.strip() != '']
+
+					for value in values:
+						if not value in SCHEMA:
+							print(f'Invalid syntax: {value} is not a valid option. Options: {", ".join(SCHEMA)}')
+							return
+
+					REFRESH_NAMES = values
+
+				elif count > 1:
+					print('Invalid syntax: Too many = in the flag %s', la)
+					return
+
+			elif la.startswith('-cf=') or la.startswith('--cache-format='):
+				count: int = la.count('=')
+
+				if count == 1:
+					index: int = la.index('=') + 1
+					value: str = la[index:]
+
+					if value not in CACHE_FORMATS:
+						print(f'Invalid syntax: {value} is not a valid option. Options: {", ".join(CACHE_FORMATS)}')
+						return
+
+					CACHE_FORMAT = value
+
+				elif count > 1:
+					print('Invalid syntax: Too many = in the flag %s', la)
+					return
+
+			elif '-z' == la or '--compress' == la:
+				COMPRESS_CACHE = True
+
+			elif '-j' == la or '--junctions' == la:
+				JUNCTIONS = True
+
+			elif '-cm' == la or '--compact' == la:
+				COMPACT = True
+
+			elif '-fl' == la or '--fast-load' == la:
+				FAST_LOAD = True
+
+			elif la.startswith('-tm=') or la.startswith('--table-mode='):
+				count: int = la.count('=')
+
+				if count == 1:
+					index: int = la.index('=') + 1
+					value: str = la[index:]
+
+					if value not in TABLE_MODES:
+						print(f'Invalid syntax: {value} is not a valid option. Options: {", ".join(TABLE_MODES)}')
+						return
+
+					TABLE_MODE = value
+
+				elif count > 1:
+					print('Invalid syntax: Too many = in the flag %s', la)
+					return
+
 	if FORCE_CACHE_UPDATE and not CACHE:
 		print('Cannot force a cache update and not have caching enabled.')
 		print('Please remove the flag to disable caching if you desire to update the existing cache.')
 
 		return
 
+	if COMPRESS_CACHE and CACHE_FORMAT != 'binary':
+		print('Only the binary cache format can be compressed.')
+		print('Please add --cache-format=binary if you desire a compressed cache.')
+
+		return
+
+	if FAST_LOAD and TABLE_MODE == 'sync':
+		print('Cannot fast-load the tables when syncing, as they are kept and only the changes are written.')
+		print('Please remove --fast-load if you desire to sync the tables.')
+
+		return
+
+	if PROFILE_DIRECTORY != '' and STREAM:
+		print('Cannot profile the phases of a stream, as they run at the same time.')
+		print('Please remove --stream if you desire to profile the load.')
+
+		return
+
+	if len(REFRESH_NAMES) > 0 and not CACHE:
+		print('Cannot refresh cached categories and not have caching enabled.')
+		print('Please remove the flag to disable caching if you desire to refresh the existing cache.')
+
+		return
+
 	if VERBOSE:
 		print('Running with Options:')
 		print('\t Database:', DATABASE)
@@ -961,9 +3990,44 @@ async def main():
 		print('\t Formatting:', FORMAT)
 		print('\t Cache:', CACHE)
 		print('\t Force Cache Update:', FORCE_CACHE_UPDATE)
-
+		print('\t Refresh:', ', '.join(REFRESH_NAMES) if len(REFRESH_NAMES) > 0 else False)
+		print('\t Cache Format:', CACHE_FORMAT)
+		print('\t Compress Cache:', COMPRESS_CACHE)
+		print('\t Page Concurrency:', PAGE_CONCURRENCY)
+		print('\t Category Concurrency:', CATEGORY_CONCURRENCY)
+		print('\t Max Retries:', MAX_RETRIES)
+		print('\t Rate Limit:', f'{RATE_LIMIT} requests/s' if RATE_LIMIT > 0 else False)
+		print('\t Connection Limit:', CONNECTION_LIMIT, 'total,', HOST_CONNECTION_LIMIT, 'per host')
+		print('\t Keep-Alive:', f'{KEEPALIVE_TIMEOUT}s' if KEEPALIVE_TIMEOUT > 0 else False)
+		print('\t DNS Cache:', f'{DNS_CACHE_TTL}s' if DNS_CACHE_TTL > 0 else False)
+		print('\t Request Timeout:', f'{REQUEST_TIMEOUT}s')
+		print('\t Gzip:', GZIP)
+		print('\t Metrics:', METRICS_PATH if METRICS_PATH != '' else False)
+		print('\t Prometheus Textfile:', PROMETHEUS_PATH if PROMETHEUS_PATH != '' else False)
+		print('\t Profile:', PROFILE_DIRECTORY if PROFILE_DIRECTORY != '' else False)
+		print('\t Load Method:', LOAD_METHOD)
+		print('\t Table Mode:', TABLE_MODE)
+		print('\t Junction Tables:', JUNCTIONS)
+		print('\t Compact Records:', COMPACT)
+		print('\t Fast Load:', FAST_LOAD)
+		print('\t Batch Size:', BATCH_SIZE)
+		print('\t Stream:', STREAM)
+		print('\t Queue Size:', QUEUE_SIZE)
+		print('\t Pool Size:', POOL_SIZE)
+		print('\t Transform Workers:', TRANSFORM_WORKERS if TRANSFORM_WORKERS > 0 else False)
+
+	if RATE_LIMIT > 0:
+		RATE_LIMITER = RateLimiter(RATE_LIMIT)
+
+	if PROFILE_DIRECTORY != '':
+		# A profiler only sees its own thread, so the tables are loaded one at a time
+		POOL_SIZE = 1
+		tracemalloc.start()
+
+	run_start: float = time.perf_counter()
+
+	streamed_names: list = []
 	custom_data_exists: bool = Path(custom_data_path).exists()
-	cache_exists: bool = Path(bin_location + '/' + filename + '.json').exists()
 
 	if CUSTOM_DATA:
 		if not custom_data_exists:
@@ -975,74 +4039,145 @@ async def main():
 		read_from_path(custom_data_path)
 
 		print('Reading from customer data complete..')
-	elif not FORCE_CACHE_UPDATE and CACHE and cache_exists:
-		print ('Reading from cache..')
+	else:
+		fetch_names: list = list(CATEGORY_NAMES)
 
-		read_from_file(filename, bin_location)
+		if not FORCE_CACHE_UPDATE and CACHE:
+			print ('Reading from cache..')
 
-		print ('Reading from cache complete..')
+			# Only the categories in use are read, each one from its own file
+			manifest: dict = read_manifest(filename, bin_location)
+			cached_names: list = []
 
-	else:
-		if CACHE and not cache_exists and not FORCE_CACHE_UPDATE:
-			print("No cache to read from..")
+			cache_read_start: float = time.perf_counter()
+
+			for category_name in CATEGORY_NAMES:
+				if category_name in REFRESH_NAMES:
+					continue
+
+				with profile_phase('cache_io'):
+					# Refreshing some categories is a sign the cache is in doubt, so the others are verified in full
+					cached: bool = read_from_file(filename, bin_location, category_name, manifest, len(REFRESH_NAMES) > 0)
+
+				if cached:
+					cached_names.append(category_name)
+
+					if VERBOSE:
+						print(f'Read {category_name} from cache, fetched at {manifest[category_name]["fetched_at"]}')
+
+			record_metrics('cache_read', seconds=time.perf_counter() - cache_read_start)
+			fetch_names = [name for name in CATEGORY_NAMES if not name in cached_names]
+
+			if len(fetch_names) == 0:
+				print ('Reading from cache complete..')
+
+			elif len(REFRESH_NAMES) > 0:
+				print('Refreshing: ' + ', '.join(fetch_names))
+
+			else:
+				print('No cache to read from for: ' + ', '.join(fetch_names))
 
 		elif FORCE_CACHE_UPDATE:
 			print("Forcing cache update..")
 
-		print ('Fetching from SWAPI..')
+		if len(fetch_names) > 0 and CACHE:
+			for category_name in fetch_names:
+				read_validators(filename, bin_location, category_name)
 
-		async with ClientSession() as session:
-			for category_name in CATEGORY_NAMES:
-				await fetch_category(session, category_name)
-		
-		print ('Fetching complete..')
+		if len(fetch_names) > 0 and STREAM:
+			streamed_names = fetch_names
+
+		elif len(fetch_names) > 0:
+			print ('Fetching from SWAPI..')
+
+			fetch_start: float = time.perf_counter()
+
+			with profile_phase('fetch'):
+				async with make_session() as session:
+					fetched: bool = await fetch_categories(session, fetch_names)
+
+			print_fetch_counts()
+			record_metrics('fetch', seconds=time.perf_counter() - fetch_start)
+
+			if not fetched:
+				print('Fetching failed, nothing was loaded or cached')
+				export_metrics(False, time.perf_counter() - run_start)
+				sys.exit(-1)
+			
+			print (f'Fetching complete in {time.perf_counter() - fetch_start:.2f}s..')
+
+			if CACHE:
+				cache_write_start: float = time.perf_counter()
+				with profile_phase('cache_io'):
+					write_to_file(filename, bin_location, fetch_names)
+				record_metrics('cache_write', seconds=time.perf_counter() - cache_write_start)
+
+				print('Exported to: ' + cache_directory(filename, bin_location))
+
+	if COMPACT:
+		for category_name in CATEGORY_NAMES:
+			compact_category(category_name)
 
-		if CACHE:
-			write_to_file(filename, bin_location)
+	if JUNCTIONS:
+		build_junction_schemas(CATEGORY_NAMES)
 
-			print('Exported to: ' + bin_location + "/" + filename + '.json')
+	build_entity_index(CATEGORY_NAMES)
 
-	extract_planet_names()
+	connections: list = []
+	# Only set once every step has succeeded, so a run cut short by an exception is reported as failed
+	succeeded: bool = False
 
 	try:
 		print(f'Connecting to postgresql database at: {HOSTNAME}:{PORT_ID}/{DATABASE}')
 
-		connection = psycopg2.connect(
-			host = HOSTNAME,
-			dbname = DATABASE,
-			user = USERNAME,
-			password = PWD,
-			port = PORT_ID)
-		cursor = connection.cursor()
-
-		print ('Constructing tables..')
+		connections = open_connections(POOL_SIZE)
 
-		for category in SCHEMA:
-			if not category in CATEGORY_NAMES:
-				continue
+		if TABLE_MODE == 'swap':
+			live_schema: str = prepare_swap(connections)
 
-			if VERBOSE:
-				print ('Constructing %s table..', category)
-			
-			if not create_table(cursor, category):
+			if live_schema is None:
+				print('There is no schema to swap the tables into, please check the search_path of the user')
 				sys.exit(-1)
 
-		print ('Populating tables..')
+		two_phase: bool = begin_two_phase(connections)
+		loaded = True
+		loaded_names: list = [name for name in CATEGORY_NAMES if not name in streamed_names]
 
-		for category in SCHEMA:
-			if not category in CATEGORY_NAMES:
-				continue
+		# The streamed categories go first, as a cached category can reference one, such as the people 
+		# of the cache referencing refreshed planets, and its references resolve through ENTITY_INDEX
+		if len(streamed_names) > 0:
+			print ('Streaming from SWAPI into the tables..')
 
-			if VERBOSE:
-				print ('Populating %s table..', category)
+			stream_start: float = time.perf_counter()
+			loaded = await stream_categories(connections, streamed_names, filename, bin_location)
+			record_metrics('stream', seconds=time.perf_counter() - stream_start)
 
-			if not populate_table(cursor, category):
-				sys.exit(-1)
+			if loaded:
+				print (f'Streaming complete in {time.perf_counter() - stream_start:.2f}s..')
 
-			if VERBOSE:	
-				print(len(DATA[category]), ' records inserted')
+				if CACHE:
+					print('Exported to: ' + cache_directory(filename, bin_location))
 
-		connection.commit()
+		if loaded and len(loaded_names) > 0:
+			print ('Constructing and populating tables..')
+
+			load_start: float = time.perf_counter()
+			loaded = await load_categories(connections, loaded_names)
+			record_metrics('load', seconds=time.perf_counter() - load_start)
+
+		if VERBOSE:
+			hits, misses = array_cache_counts()
+			print(f'{hits} array fields were read from the cache, {misses} were parsed')
+
+		loaded = finish_connections(connections, loaded, two_phase)
+
+		if loaded and TABLE_MODE == 'swap':
+			loaded = swap_tables(connections[0], CATEGORY_NAMES, live_schema)
+
+		if not loaded:
+			sys.exit(-1)
+
+		succeeded = True
 
 	except psycopg2.errors.OperationalError as e:
 		print("Failed to connect.. \n{0}".format(e))
@@ -1054,11 +4189,13 @@ async def main():
 		sys.exit(-1)
 
 	finally:
-		if cursor is not None:
-			cursor.close()
-
-		if connection is not None:
+		for connection in connections:
 			connection.close()
 
+		export_metrics(succeeded, time.perf_counter() - run_start)
+
+		if PROFILE_DIRECTORY != '':
+			write_profiles()
+
 if __name__ == '__main__':
 	asyncio.run(main())
\ No newline at end of file